@@ -0,0 +1,72 @@
+"""
+Allocation benchmark for `Prompt.rendered`.
+
+Compares the memory allocated by repeatedly reading `messages_dict`,
+`metadata` and `structured_output_format` from `Prompt` against reading them
+from the cached `RenderedPrompt`.
+
+Usage:
+    python benchmarks/rendered_prompt_allocations.py [ITERATIONS]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+# The sample prompts reference models under `tests.`, importable from the root.
+sys.path.insert(0, str(ROOT))
+
+from drtail_prompt import load_prompt  # noqa: E402
+
+PROMPT_PATH = str(ROOT / "tests/drtail_prompt/data/basic_1.yaml")
+
+
+def measure(fn: Callable[[], Any], iterations: int) -> tuple[int, float]:
+    """Return peak bytes allocated by a single call and mean seconds per call."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return peak, (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    prompt = load_prompt(PROMPT_PATH)
+
+    def uncached() -> Any:
+        return (
+            prompt.messages_dict,
+            prompt.metadata,
+            prompt.structured_output_format,
+        )
+
+    def cached() -> Any:
+        rendered = prompt.rendered
+        return (
+            rendered.messages_dict,
+            rendered.metadata,
+            rendered.structured_output_format,
+        )
+
+    cached()  # warm the cache so only steady-state access is measured
+
+    for label, fn in (("Prompt", uncached), ("RenderedPrompt", cached)):
+        peak, per_call = measure(fn, iterations)
+        print(
+            f"{label:<16} alloc_per_call={peak}B time_per_call={per_call * 1e6:.2f}us",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Benchmark suite for the prompt pipeline.
+
+Runs each phase (load, validate, render, yaml_filter, schema) over synthetic
+prompts parameterized by message count, template complexity and input size,
+and reports throughput, latency percentiles and peak memory per phase.
+Results can be saved as a JSON baseline and compared against a stored one;
+the run fails when a result regresses past the threshold.
+
+Usage (from the repository root):
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.2
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Callable
+
+import click
+
+from benchmarks import synthetic
+from drtail_prompt import load_prompt
+from drtail_prompt.template import yaml as yaml_filter
+
+PHASES = ("load", "validate", "render", "yaml_filter", "schema")
+# Metrics compared against the baseline; higher is worse for all of them.
+COMPARED_METRICS = ("p50_ms", "peak_memory_kib")
+
+
+def phase_function(phase: str, path: Path, data: dict[str, Any]) -> Callable[[], Any]:
+    prompt = load_prompt(str(path))
+    assert prompt.data.input is not None
+
+    if phase == "load":
+        return lambda: load_prompt(str(path))
+    if phase == "validate":
+        return lambda: prompt.data.input.instance_validate(data)  # type: ignore[union-attr]
+    if phase == "render":
+        return lambda: prompt.with_inputs(data)
+    if phase == "yaml_filter":
+        return lambda: yaml_filter(data)
+    if phase == "schema":
+        return lambda: prompt.structured_output_format
+    raise ValueError(f"Unknown phase: {phase}")
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted `samples`."""
+    index = max(0, min(len(samples) - 1, round(q / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int) -> dict[str, float]:
+    for _ in range(warmup):
+        fn()
+
+    samples: list[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+
+    # Memory is traced in a separate call, tracemalloc would skew the timings.
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total_ms = sum(samples)
+    return {
+        "iterations": iterations,
+        "ops_per_sec": iterations / total_ms * 1000 if total_ms else 0.0,
+        "mean_ms": total_ms / iterations,
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+        "peak_memory_kib": peak / 1024,
+    }
+
+
+def run_suite(
+    messages: Iterable[int],
+    complexities: Iterable[str],
+    input_sizes: Iterable[int],
+    phases: Iterable[str] = PHASES,
+    iterations: int = 50,
+    warmup: int = 5,
+) -> dict[str, Any]:
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for message_count, complexity, size in itertools.product(
+            messages,
+            complexities,
+            input_sizes,
+        ):
+            path = synthetic.write_prompt(Path(directory), message_count, complexity)
+            data = synthetic.inputs(size)
+            case = f"messages={message_count},complexity={complexity},input_size={size}"
+            for phase in phases:
+                fn = phase_function(phase, path, data)
+                results[f"{case}/{phase}"] = measure(fn, iterations, warmup)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float,
+) -> list[str]:
+    """Returns a description of every metric that regressed past `threshold`."""
+    regressions: list[str] = []
+    for key, result in results["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = base[metric], result[metric]
+            if before > 0 and after > before * (1 + threshold):
+                regressions.append(
+                    f"{key} {metric}: {before:.3f} -> {after:.3f} "
+                    f"(+{(after / before - 1) * 100:.1f}%)",
+                )
+    return regressions
+
+
+def format_table(results: dict[str, Any]) -> str:
+    header = (
+        f"{'case/phase':<64} {'ops/s':>10} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'peak KiB':>10}"
+    )
+    lines = [header, "-" * len(header)]
+    for key, result in results["results"].items():
+        lines.append(
+            f"{key:<64} {result['ops_per_sec']:>10.1f} {result['p50_ms']:>9.3f} "
+            f"{result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} "
+            f"{result['peak_memory_kib']:>10.1f}",
+        )
+    return "\n".join(lines)
+
+
+def _int_list(ctx: click.Context, param: click.Parameter, value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def _choice_list(choices: Iterable[str]) -> Callable[..., list[str]]:
+    def parse(ctx: click.Context, param: click.Parameter, value: str) -> list[str]:
+        values = value.split(",")
+        for v in values:
+            if v not in choices:
+                raise click.BadParameter(f"{v!r} is not one of {', '.join(choices)}")
+        return values
+
+    return parse
+
+
+@click.command()
+@click.option("--messages", default="1,10", callback=_int_list, help="Message counts.")
+@click.option(
+    "--complexity",
+    default=",".join(synthetic.COMPLEXITIES),
+    callback=_choice_list(synthetic.COMPLEXITIES),
+    help="Template complexities.",
+)
+@click.option(
+    "--input-size",
+    default="1,100",
+    callback=_int_list,
+    help="Number of items in the input list.",
+)
+@click.option(
+    "--phase",
+    default=",".join(PHASES),
+    callback=_choice_list(PHASES),
+    help="Phases to measure.",
+)
+@click.option("--iterations", default=50, type=click.IntRange(min=1))
+@click.option("--warmup", default=5, type=click.IntRange(min=0))
+@click.option(
+    "--save",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write results to this JSON file.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Compare results against this JSON baseline.",
+)
+@click.option(
+    "--threshold",
+    default=0.2,
+    type=click.FloatRange(min=0),
+    help="Allowed relative regression against the baseline (0.2 = 20%).",
+)
+def main(
+    messages: list[int],
+    complexity: list[str],
+    input_size: list[int],
+    phase: list[str],
+    iterations: int,
+    warmup: int,
+    save: Path | None,
+    baseline: Path | None,
+    threshold: float,
+) -> None:
+    """Benchmark load, validate, render, yaml filter and schema phases."""
+    results = run_suite(messages, complexity, input_size, phase, iterations, warmup)
+    click.echo(format_table(results))
+
+    if save:
+        with open(save, "w") as f:
+            json.dump(results, f, indent=2)
+        click.echo(f"\nResults saved to {save}")
+
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), threshold)
+        if regressions:
+            click.echo(f"\nRegressions past {threshold:.0%}:", err=True)
+            for regression in regressions:
+                click.echo(f"  {regression}", err=True)
+            sys.exit(1)
+        click.echo(f"\nNo regressions past {threshold:.0%} against {baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Synthetic prompts and inputs for the benchmark suite.
+
+Prompts are parameterized by message count, template complexity and input
+size (the number of items in the input list). The input/output models live in
+this module so that generated prompts can reference them by import path.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import yaml
+from pydantic import BaseModel
+
+COMPLEXITIES = ("simple", "loops", "nested")
+
+
+class BenchmarkItem(BaseModel):
+    name: str
+    description: str
+    tags: list[str]
+    attributes: dict[str, str]
+
+
+class BenchmarkInput(BaseModel):
+    title: str
+    audience: str
+    items: list[BenchmarkItem]
+
+
+class BenchmarkOutput(BaseModel):
+    summary: str
+    items: list[BenchmarkItem]
+
+
+TEMPLATES = {
+    # Plain substitutions only
+    "simple": (
+        "You are a helpful assistant writing about {{ title }} for {{ audience }}.\n"
+        "There are {{ items | length }} items to consider.\n"
+    ),
+    # A single loop over the input list
+    "loops": (
+        "You are a helpful assistant writing about {{ title }} for {{ audience }}.\n"
+        "{% for item in items %}\n"
+        "- {{ item.name }}: {{ item.description }} ({{ item.tags | join(', ') }})\n"
+        "{% endfor %}\n"
+    ),
+    # Nested loops, conditionals and the yaml filter
+    "nested": (
+        "You are a helpful assistant writing about {{ title }} for {{ audience }}.\n"
+        "{% for item in items %}\n"
+        "## {{ item.name | upper }}\n"
+        "{% if item.tags %}\n"
+        "{% for tag in item.tags %}\n"
+        "- tag {{ loop.index }}: {{ tag }}\n"
+        "{% endfor %}\n"
+        "{% endif %}\n"
+        "{% for key, value in item.attributes.items() %}\n"
+        "* {{ key }} = {{ value }}\n"
+        "{% endfor %}\n"
+        "{% endfor %}\n"
+        "{{ items[0] | yaml }}\n"
+    ),
+}
+
+
+def prompt_document(messages: int, complexity: str) -> dict[str, Any]:
+    """Returns a prompt YAML document with `messages` templated messages."""
+    return {
+        "api": "drtail/prompt@v1",
+        "version": "1.0.0",
+        "name": f"Benchmark {complexity} x{messages}",
+        "description": "Synthetic prompt for benchmarks",
+        "authors": [{"name": "Benchmark", "email": "benchmark@example.com"}],
+        "metadata": {"role": "benchmark", "domain": "benchmark", "action": "render"},
+        "input": {"type": "pydantic", "model": f"{__name__}.BenchmarkInput"},
+        "output": {"type": "pydantic", "model": f"{__name__}.BenchmarkOutput"},
+        "messages": [
+            {
+                "role": "developer" if index == 0 else "user",
+                "content": TEMPLATES[complexity],
+            }
+            for index in range(messages)
+        ],
+    }
+
+
+def write_prompt(directory: Path, messages: int, complexity: str) -> Path:
+    path = directory / f"benchmark_{complexity}_{messages}.prompt.yaml"
+    with open(path, "w") as f:
+        yaml.safe_dump(prompt_document(messages, complexity), f, sort_keys=False)
+    return path
+
+
+def inputs(size: int) -> dict[str, Any]:
+    """Returns inputs whose `items` list has `size` entries."""
+    return {
+        "title": "Synthetic benchmark",
+        "audience": "engineers",
+        "items": [
+            {
+                "name": f"item-{index}",
+                "description": f"Description of item {index}. " * 4,
+                "tags": [f"tag-{index}-{tag}" for tag in range(4)],
+                "attributes": {f"key-{key}": f"value-{key}" for key in range(4)},
+            }
+            for index in range(size)
+        ],
+    }
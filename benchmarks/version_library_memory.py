@@ -0,0 +1,101 @@
+"""
+Memory report for a library holding every published version of its prompts.
+
+Writes a synthetic library of PROMPTS prompts with VERSIONS versions each,
+where versions only differ in their last message, then loads all of it and
+compiles every message template. Reports the traced memory with interning
+disabled and enabled, and what the intern pool deduplicated.
+
+Usage (from the repository root):
+    python -m benchmarks.version_library_memory [PROMPTS] [VERSIONS]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from benchmarks import synthetic
+from drtail_prompt import load_prompt
+from drtail_prompt.interning import pool
+from drtail_prompt.template import compile_template
+
+
+def write_library(directory: Path, prompts: int, versions: int) -> list[Path]:
+    paths = []
+    for prompt in range(prompts):
+        for version in range(versions):
+            document = synthetic.prompt_document(5, "nested")
+            document["name"] = f"Library prompt {prompt}"
+            document["version"] = f"1.{version}.0"
+            for message in document["messages"]:
+                message["content"] = f"Prompt {prompt}.\n{message['content']}"
+            document["messages"][-1]["content"] += f"Revision {version}.\n"
+            path = directory / f"prompt_{prompt}_v{version}.yaml"
+            with open(path, "w") as f:
+                yaml.safe_dump(document, f, sort_keys=False)
+            paths.append(path)
+    return paths
+
+
+def load_library(paths: list[Path], share: bool) -> tuple[int, int, list[Any]]:
+    """
+    Loads every prompt and compiles its templates, returning the traced bytes
+    held afterwards, the number of compiled templates and the library.
+    """
+    pool.enabled = share
+    compile_template.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    library = []
+    templates: dict[int, Any] = {}
+    for path in paths:
+        prompt = load_prompt(str(path))
+        for message in prompt.messages:
+            # Without sharing, each version keeps its own compiled templates
+            template = (
+                compile_template(message.content)
+                if share
+                else compile_template.__wrapped__(message.content)
+            )
+            templates[id(template)] = template
+        library.append(prompt)
+
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held, len(templates), [library, templates]
+
+
+def main() -> None:
+    prompts = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    versions = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_library(Path(directory), prompts, versions)
+        results = {}
+        for label, share in (("disabled", False), ("enabled", True)):
+            pool.reset()
+            held, template_count, library = load_library(paths, share)
+            results[label] = (held, template_count)
+            report = pool.report()
+            del library
+
+    print(f"{prompts} prompts x {versions} versions, 5 messages each")
+    print(f"{'interning':<10} {'held KiB':>10} {'templates':>10}")
+    for label, (held, template_count) in results.items():
+        print(f"{label:<10} {held / 1024:>10.1f} {template_count:>10}")
+    saved = 1 - results["enabled"][0] / results["disabled"][0]
+    print(f"\nSaved {saved:.0%} of the memory held by the library")
+    print(f"Intern pool: {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,65 @@
-from .core import Prompt, load_prompt
-from .exception import (
-    DrTailPromptBaseException,
-    PromptValidationError,
-    PromptVersionMismatchError,
-)
-from .schema import BasicPromptSchema
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .conversation import Conversation
+    from .core import Prompt, RenderedPrompt, load_package_prompt, load_prompt
+    from .exception import (
+        DrTailPromptBaseException,
+        PromptBudgetExceededError,
+        PromptRenderLimitError,
+        PromptValidationError,
+        PromptVersionMismatchError,
+    )
+    from .schema import BasicPromptSchema
 
 __all__ = [
     "BasicPromptSchema",
+    "Conversation",
     "DrTailPromptBaseException",
     "Prompt",
+    "PromptBudgetExceededError",
+    "PromptRenderLimitError",
     "PromptValidationError",
     "PromptVersionMismatchError",
+    "RenderedPrompt",
+    "load_package_prompt",
     "load_prompt",
 ]
 
-from importlib.metadata import version
+# Public attributes are imported on first access, so that importing the
+# package (e.g. for the CLI or a serverless handler) doesn't pull in pydantic,
+# PyYAML and Jinja2 before they are needed.
+_LAZY_ATTRIBUTES = {
+    "BasicPromptSchema": ".schema",
+    "Conversation": ".conversation",
+    "DrTailPromptBaseException": ".exception",
+    "Prompt": ".core",
+    "PromptBudgetExceededError": ".exception",
+    "PromptRenderLimitError": ".exception",
+    "PromptValidationError": ".exception",
+    "PromptVersionMismatchError": ".exception",
+    "RenderedPrompt": ".core",
+    "load_package_prompt": ".core",
+    "load_prompt": ".core",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name == "__version__":
+        from importlib.metadata import version
+
+        value: Any = version("drtail-prompt")
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache it, later accesses don't go through __getattr__
+    globals()[name] = value
+    return value
+
 
-__version__ = version("drtail-prompt")
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__, "__version__"})
@@ -0,0 +1,426 @@
+"""
+Static render-cost analysis of prompt messages.
+
+Walks each message's Jinja AST, without rendering it, for its loop nesting,
+filter usage and the input fields its output size scales with. The rendered
+size is estimated as a polynomial in the lengths of iterated input fields,
+each term being the characters rendered per combination of loop iterations,
+e.g. `40 + 52*len(documents)`. Conditionals count their largest branch and
+loop filters are assumed to keep every item. Lengths and value sizes come
+from the input schema (`maxItems`, `maximum`, `maxLength`), or defaults.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from math import prod
+from typing import TYPE_CHECKING, Any, Optional
+
+from jinja2 import nodes
+
+from drtail_prompt.template import environment
+
+if TYPE_CHECKING:
+    from drtail_prompt.schema import BasicPromptSchema, IOBase
+
+# Assumed length of iterated fields without a `maxItems` (or `maximum`)
+DEFAULT_LIST_LENGTH = 10
+# Assumed size of rendered values without a `maxLength`
+DEFAULT_VALUE_SIZE = 50
+# Factor of loops over something that isn't an input field
+UNKNOWN_FIELD = "<unknown>"
+
+# Loop fields multiplying a size term, outermost first
+Loops = tuple[str, ...]
+# Rendered characters per term
+Terms = dict[Loops, int]
+# Template variables to the input field path they hold, `None` for locals
+Scope = dict[str, Optional[str]]
+
+_ITERATION_METHODS = frozenset({"items", "keys", "values"})
+# Filters reducing a list to a single value, whose output doesn't scale with it
+_SCALAR_FILTERS = frozenset({"count", "first", "last", "length", "max", "min", "sum"})
+_TEMPLATE_REFERENCES = (nodes.Include, nodes.Import, nodes.FromImport, nodes.Extends)
+
+
+def _add(terms: Terms, other: Terms, factor: int = 1) -> None:
+    for key, size in other.items():
+        terms[key] = terms.get(key, 0) + size * factor
+
+
+def _largest(branches: list[Terms]) -> Terms:
+    """Term-wise maximum, an upper bound of whichever branch renders."""
+    terms: Terms = {}
+    for branch in branches:
+        for key, size in branch.items():
+            terms[key] = max(terms.get(key, 0), size)
+    return terms
+
+
+def _find_all(node: nodes.Node, node_type: type[nodes.Node]) -> Iterator[Any]:
+    if isinstance(node, node_type):
+        yield node
+    yield from node.find_all(node_type)
+
+
+class _Walker:
+    def __init__(self, schema: dict[str, Any], value_size: int) -> None:
+        self.schema = schema
+        self.value_size = value_size
+        self.depth = 0
+        self.loop_depth = 0
+        self.filters: dict[str, dict[str, int]] = {}
+        self.fields: dict[str, set[str]] = {}
+        self.includes: list[str] = []
+
+    def walk(self, body: Sequence[nodes.Node], scope: Scope, loops: Loops) -> Terms:
+        terms: Terms = {}
+        for node in body:
+            _add(terms, self.statement(node, scope, loops))
+        return terms
+
+    def statement(self, node: nodes.Node, scope: Scope, loops: Loops) -> Terms:
+        if isinstance(node, nodes.Output):
+            return self.output(node, scope, loops)
+        if isinstance(node, nodes.For):
+            return self.loop(node, scope, loops)
+        if isinstance(node, nodes.If):
+            return self.branch(node, scope, loops)
+        if isinstance(node, nodes.Assign):
+            self.record_filters(node.node)
+            for name in _find_all(node.target, nodes.Name):
+                scope[name.name] = self.path(node.node, scope)
+            return {}
+        if isinstance(node, _TEMPLATE_REFERENCES):
+            self.reference(node, scope)
+            return {}
+        return self.nested(node, scope, loops)
+
+    def reference(self, node: nodes.Node, scope: Scope) -> None:
+        name = getattr(node, "template", None)
+        if isinstance(name, nodes.Const):
+            self.includes.append(name.value)
+        else:
+            self.includes.append("<dynamic>")
+        for imported in _imported_names(node):
+            scope[imported] = None
+
+    def nested(self, node: nodes.Node, scope: Scope, loops: Loops) -> Terms:
+        """
+        Blocks, macros, call blocks, `with` and `set` blocks: their expressions
+        and nested statements, counted as rendered once.
+        """
+        if isinstance(node, nodes.Macro):
+            scope[node.name] = None
+        inner = dict(scope)
+        statements = []
+        for child in node.iter_child_nodes():
+            if isinstance(child, nodes.Stmt):
+                statements.append(child)
+                continue
+            self.record_filters(child)
+            for name in _find_all(child, nodes.Name):
+                if name.ctx == "store":
+                    scope[name.name] = inner[name.name] = None
+                elif name.ctx == "param":
+                    inner[name.name] = None
+        return self.walk(statements, inner, loops)
+
+    def output(self, node: nodes.Output, scope: Scope, loops: Loops) -> Terms:
+        terms: Terms = {}
+        for child in node.nodes:
+            if isinstance(child, nodes.TemplateData):
+                _add(terms, {loops: len(child.data)})
+                continue
+            self.record_filters(child)
+            fields = list(self.output_fields(child, scope, in_yaml=False))
+            if not fields:
+                size = (
+                    len(str(child.value))
+                    if isinstance(child, nodes.Const)
+                    else self.value_size
+                )
+                _add(terms, {loops: size})
+            for path, kind in fields:
+                self.fields.setdefault(path, set()).add(kind)
+                schema = self.subschema(path) or {}
+                if schema.get("type") == "array":
+                    _add(terms, {(*loops, path): self.value_size})
+                else:
+                    _add(terms, {loops: schema.get("maxLength", self.value_size)})
+        return terms
+
+    def loop(self, node: nodes.For, scope: Scope, loops: Loops) -> Terms:
+        self.record_filters(node.iter)
+        if node.test is not None:
+            self.record_filters(node.test)
+        path = self.iterable_path(node.iter, scope)
+        body_scope = dict(scope)
+        # Items of `range(count)` are numbers, not fields
+        item = f"{path}[]" if path and not _is_range(node.iter) else None
+        for name in _find_all(node.target, nodes.Name):
+            body_scope[name.name] = item
+
+        self.depth += 1
+        self.loop_depth = max(self.loop_depth, self.depth)
+        count = _constant_length(node.iter)
+        if count is not None:
+            terms: Terms = {}
+            _add(terms, self.walk(node.body, body_scope, loops), count)
+        else:
+            factor = path or UNKNOWN_FIELD
+            if path:
+                self.fields.setdefault(path, set()).add("loop")
+            terms = self.walk(node.body, body_scope, (*loops, factor))
+        self.depth -= 1
+        return _largest([terms, self.walk(node.else_, dict(scope), loops)])
+
+    def branch(self, node: nodes.If, scope: Scope, loops: Loops) -> Terms:
+        branches = []
+        for condition in [node, *node.elif_]:
+            self.record_filters(condition.test)
+            branches.append(self.walk(condition.body, dict(scope), loops))
+        branches.append(self.walk(node.else_, dict(scope), loops))
+        return _largest(branches)
+
+    def record_filters(self, expression: nodes.Node) -> None:
+        for node in _find_all(expression, nodes.Filter):
+            use = self.filters.setdefault(node.name, {"uses": 0, "max_loop_depth": 0})
+            use["uses"] += 1
+            use["max_loop_depth"] = max(use["max_loop_depth"], self.depth)
+
+    def path(self, node: nodes.Node, scope: Scope) -> str | None:
+        """Dotted input field path of a variable, e.g. `documents[].title`."""
+        if isinstance(node, nodes.Name):
+            if node.name in scope:
+                return scope[node.name]
+            if node.name == "loop" or node.name in environment.globals:
+                return None
+            return node.name
+        if isinstance(node, nodes.Getattr):
+            base = self.path(node.node, scope)
+            return f"{base}.{node.attr}" if base else None
+        if isinstance(node, nodes.Getitem):
+            base = self.path(node.node, scope)
+            if not base:
+                return None
+            if isinstance(node.arg, nodes.Const) and isinstance(node.arg.value, str):
+                return f"{base}.{node.arg.value}"
+            return f"{base}[]"
+        return None
+
+    def iterable_path(
+        self,
+        node: nodes.Node,
+        scope: Scope,
+    ) -> str | None:
+        """Field iterated by a loop: `documents|sort`, `mapping.items()` or `range(count)`."""
+        if isinstance(node, nodes.Filter) and node.node is not None:
+            return self.iterable_path(node.node, scope)
+        if isinstance(node, nodes.Call):
+            if (
+                isinstance(node.node, nodes.Getattr)
+                and node.node.attr in _ITERATION_METHODS
+            ):
+                return self.path(node.node.node, scope)
+            if _is_range(node) and node.args:
+                return self.path(
+                    node.args[-1] if len(node.args) < 3 else node.args[1],
+                    scope,
+                )
+        return self.path(node, scope)
+
+    def output_fields(
+        self,
+        node: nodes.Node,
+        scope: Scope,
+        in_yaml: bool,
+    ) -> Iterator[tuple[str, str]]:
+        path = self.path(node, scope)
+        if path:
+            yield path, "yaml" if in_yaml else "value"
+            return
+        if isinstance(node, nodes.Filter) and node.name in _SCALAR_FILTERS:
+            return
+        for child in node.iter_child_nodes():
+            nested_yaml = in_yaml or (
+                isinstance(node, nodes.Filter)
+                and node.name == "yaml"
+                and child is node.node
+            )
+            yield from self.output_fields(child, scope, nested_yaml)
+
+    def subschema(self, path: str) -> dict[str, Any] | None:
+        """Schema of the input field at `path`, or `None` when it isn't declared."""
+        schema: dict[str, Any] | None = self.resolve(self.schema)
+        for segment in path.split("."):
+            name = segment.rstrip("[]")
+            schema = self.resolve((schema or {}).get("properties", {}).get(name))
+            for _ in range(segment.count("[]")):
+                schema = self.resolve((schema or {}).get("items"))
+            if schema is None:
+                return None
+        return schema
+
+    def resolve(self, schema: dict[str, Any] | None) -> dict[str, Any] | None:
+        """Follows local `$ref`s and the non-null choice of an optional field."""
+        while schema is not None:
+            if "$ref" in schema:
+                target: Any = self.schema
+                for key in schema["$ref"].removeprefix("#/").split("/"):
+                    target = target.get(key, {}) if isinstance(target, dict) else {}
+                schema = target or None
+            elif "anyOf" in schema:
+                options = [
+                    option for option in schema["anyOf"] if option.get("type") != "null"
+                ]
+                if len(options) != 1:
+                    return schema
+                schema = options[0]
+            else:
+                return schema
+        return None
+
+    def length(self, factor: str, default: int) -> tuple[int, str]:
+        schema = self.subschema(factor) if factor != UNKNOWN_FIELD else None
+        for keyword in ("maxItems", "maximum", "maxLength"):
+            if schema is not None and keyword in schema:
+                return int(schema[keyword]), keyword
+        return default, "default"
+
+
+def _is_range(node: nodes.Node) -> bool:
+    return (
+        isinstance(node, nodes.Call)
+        and isinstance(node.node, nodes.Name)
+        and node.node.name == "range"
+    )
+
+
+def _imported_names(node: nodes.Node) -> list[str]:
+    """Template variables set by `{% import %}` and `{% from ... import %}`."""
+    if isinstance(node, nodes.Import):
+        return [node.target]
+    if isinstance(node, nodes.FromImport):
+        return [name if isinstance(name, str) else name[1] for name in node.names]
+    return []
+
+
+def _constant_length(node: nodes.Node) -> int | None:
+    """Iteration count of a loop over a literal or `range` of constants."""
+    if isinstance(node, (nodes.List, nodes.Tuple)):
+        return len(node.items)
+    if isinstance(node, nodes.Call) and _is_range(node):
+        args = [arg.value for arg in node.args if isinstance(arg, nodes.Const)]
+        if args and len(args) == len(node.args):
+            return len(range(*args))
+    return None
+
+
+def _input_schema(io: IOBase | None) -> dict[str, Any]:
+    if io is None:
+        return {}
+    if io.schema_:
+        return io.schema_
+    if io.instance is not None:
+        return io.instance.model_json_schema()
+    return {}
+
+
+def _formula(terms: Terms) -> str:
+    parts = [
+        "*".join([str(size), *(f"len({factor})" for factor in key)])
+        for key, size in sorted(terms.items(), key=lambda item: (len(item[0]), item[0]))
+        if size
+    ]
+    return " + ".join(parts) or "0"
+
+
+def analyze_prompt(
+    prompt: BasicPromptSchema,
+    list_length: int = DEFAULT_LIST_LENGTH,
+    value_size: int = DEFAULT_VALUE_SIZE,
+) -> dict[str, Any]:
+    """
+    Returns the render-cost report of an unrendered prompt: per message and
+    overall loop depth, filter uses, scaling fields (kinds `loop`, `value` and
+    `yaml`) and the estimated rendered size, with the lengths it assumed.
+    """
+    schema = _input_schema(prompt.input)
+    messages: list[dict[str, Any]] = []
+    lengths: dict[str, dict[str, Any]] = {}
+    for message in prompt.messages:
+        walker = _Walker(schema, value_size)
+        terms = walker.walk(environment.parse(message.content).body, {}, ())
+        estimated_size = 0
+        for key, size in terms.items():
+            for factor in key:
+                length, source = walker.length(factor, list_length)
+                lengths[factor] = {"length": length, "source": source}
+            estimated_size += size * prod(lengths[factor]["length"] for factor in key)
+        messages.append(
+            {
+                "role": message.role,
+                "loop_depth": walker.loop_depth,
+                "filters": dict(sorted(walker.filters.items())),
+                "fields": {
+                    path: sorted(kinds) for path, kinds in sorted(walker.fields.items())
+                },
+                "includes": walker.includes,
+                "size_formula": _formula(terms),
+                "estimated_size": estimated_size,
+            },
+        )
+
+    filters: dict[str, dict[str, int]] = {}
+    fields: dict[str, set[str]] = {}
+    for message_report in messages:
+        for name, use in message_report["filters"].items():
+            total = filters.setdefault(name, {"uses": 0, "max_loop_depth": 0})
+            total["uses"] += use["uses"]
+            total["max_loop_depth"] = max(
+                total["max_loop_depth"],
+                use["max_loop_depth"],
+            )
+        for path, kinds in message_report["fields"].items():
+            fields.setdefault(path, set()).update(kinds)
+    return {
+        "name": prompt.name,
+        "version": prompt.version,
+        "loop_depth": max((m["loop_depth"] for m in messages), default=0),
+        "filters": dict(sorted(filters.items())),
+        "fields": {path: sorted(kinds) for path, kinds in sorted(fields.items())},
+        "estimated_size": sum(m["estimated_size"] for m in messages),
+        "lengths": dict(sorted(lengths.items())),
+        "messages": messages,
+    }
+
+
+def format_analysis(report: dict[str, Any]) -> str:
+    lines = [
+        f"{'message':<12} {'loops':>5}  {'estimated size':>14}  size formula",
+    ]
+    for index, message in enumerate(report["messages"]):
+        label = f"{index} {message['role']}"
+        lines.append(
+            f"{label:<12} {message['loop_depth']:>5}  "
+            f"{message['estimated_size']:>14}  {message['size_formula']}",
+        )
+    lines.append(
+        f"{'total':<12} {report['loop_depth']:>5}  {report['estimated_size']:>14}",
+    )
+    if report["lengths"]:
+        lines.append("\nAssumed lengths:")
+        for factor, length in report["lengths"].items():
+            lines.append(f"  len({factor}) = {length['length']} ({length['source']})")
+    if report["fields"]:
+        lines.append("\nScaling fields:")
+        for path, kinds in report["fields"].items():
+            lines.append(f"  {path}: {', '.join(kinds)}")
+    if report["filters"]:
+        lines.append("\nFilters:")
+        for name, use in report["filters"].items():
+            lines.append(
+                f"  {name}: used {use['uses']}x, max loop depth {use['max_loop_depth']}",
+            )
+    return "\n".join(lines)
@@ -0,0 +1,211 @@
+"""
+Fits rendered prompts under a size budget by truncating input fields.
+
+Messages are rendered once with the full inputs. When they exceed the
+budget, truncatable fields are cut in priority order: only the messages whose
+template references a field are re-rendered, and the truncation point is
+found by a binary search seeded with a linear size estimate.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+from jinja2 import meta
+
+from drtail_prompt import guardrails
+from drtail_prompt.exception import PromptBudgetExceededError, PromptValidationError
+from drtail_prompt.template import compile_template, environment
+
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+    from drtail_prompt.schema import Budget, TruncatableField
+
+TokenCounter = Callable[[str], int]
+
+_counters: dict[str, TokenCounter] = {
+    "chars": len,
+    "bytes": lambda text: len(text.encode("utf-8")),
+}
+
+
+def register_token_counter(unit: str, counter: TokenCounter) -> None:
+    """
+    Registers `counter` as the size measure of budgets declared with `unit`,
+    e.g. a tokenizer for a provider's token limit.
+    """
+    _counters[unit] = counter
+
+
+def get_token_counter(unit: str) -> TokenCounter:
+    try:
+        return _counters[unit]
+    except KeyError:
+        raise PromptValidationError(
+            f"Unknown budget unit '{unit}'. Register it with register_token_counter",
+        ) from None
+
+
+@lru_cache(maxsize=1024)
+def referenced_names(source: str) -> frozenset[str] | None:
+    """
+    Returns the top-level input names a message template references, or `None`
+    when it includes other templates that may reference any of them.
+    """
+    ast = environment.parse(source)
+    if any(True for _ in meta.find_referenced_templates(ast)):
+        return None
+    return frozenset(meta.find_undeclared_variables(ast))
+
+
+class _Attempt(NamedTuple):
+    size: int
+    contents: list[str]
+    sizes: list[int]
+    data: dict[str, Any]
+
+
+def render_within_budget(
+    budget: Budget,
+    sources: list[str],
+    data: dict[str, Any],
+) -> list[str]:
+    """
+    Renders message `sources` with `data`, truncating the budget's fields until
+    the total size fits. Raises `PromptBudgetExceededError` when it can't.
+    """
+    counter = get_token_counter(budget.unit)
+    templates = [compile_template(source) for source in sources]
+    contents = [guardrails.render(template, data) for template in templates]
+    sizes = [counter(content) for content in contents]
+    total = sum(sizes)
+
+    # Lower priorities are truncated first; ties keep the declaration order
+    for field in sorted(budget.truncate, key=lambda field: field.priority):
+        if total <= budget.max_size:
+            break
+        value = _get(data, field.field)
+        if not isinstance(value, (str, list, tuple)) or not value:
+            continue
+        dependent = [
+            index
+            for index, source in enumerate(sources)
+            if _references(source, field.field)
+        ]
+        if not dependent:
+            continue
+
+        attempt = _truncate_field(
+            budget.max_size,
+            total,
+            total - sum(sizes[index] for index in dependent),
+            [templates[index] for index in dependent],
+            counter,
+            data,
+            field,
+            value,
+        )
+        data = attempt.data
+        total = attempt.size
+        for index, content, size in zip(dependent, attempt.contents, attempt.sizes):
+            contents[index] = content
+            sizes[index] = size
+
+    if total > budget.max_size:
+        raise PromptBudgetExceededError(
+            f"Rendered prompt is {total} {budget.unit}, over the budget of "
+            f"{budget.max_size} {budget.unit}",
+        )
+    return contents
+
+
+def _truncate_field(
+    max_size: int,
+    full_size: int,
+    fixed_size: int,
+    templates: list[Template],
+    counter: TokenCounter,
+    data: dict[str, Any],
+    field: TruncatableField,
+    value: str | list[Any] | tuple[Any, ...],
+) -> _Attempt:
+    """
+    Returns the render with the longest truncation of `value` that fits, or the
+    render with `value` emptied when none does.
+    """
+
+    def attempt(length: int) -> _Attempt:
+        candidate = _set(data, field.field, _truncate(value, length, field))
+        contents = [guardrails.render(template, candidate) for template in templates]
+        sizes = [counter(content) for content in contents]
+        return _Attempt(fixed_size + sum(sizes), contents, sizes, candidate)
+
+    best = attempt(0)
+    if best.size > max_size:
+        return best
+
+    # The full length is known not to fit; search the longest fitting one in
+    # [0, len(value)). The first probe is a linear estimate between the sizes
+    # at length 0 and the full length. Probes then gallop away from it with a
+    # doubling step until the answer is bracketed, and bisect the bracket.
+    per_item = (full_size - best.size) / len(value)
+    probe = int((max_size - best.size) / per_item) if per_item > 0 else 0
+    low, high = 0, len(value) - 1
+    estimate_fits: bool | None = None
+    step = 1
+    while low < high:
+        probe = min(max(probe, low + 1), high)
+        result = attempt(probe)
+        fits = result.size <= max_size
+        if fits:
+            low, best = probe, result
+        else:
+            high = probe - 1
+        if estimate_fits is None:
+            estimate_fits = fits
+        if step and fits is estimate_fits:
+            probe = probe + step if fits else probe - step
+            step *= 2
+        else:
+            # Bracketed, bisect from now on
+            step = 0
+            probe = (low + high + 1) // 2
+    return best
+
+
+def _truncate(
+    value: str | list[Any] | tuple[Any, ...],
+    length: int,
+    field: TruncatableField,
+) -> Any:
+    if length >= len(value):
+        return value
+    if field.keep == "head":
+        kept = value[:length]
+        return kept + field.marker if isinstance(kept, str) else kept
+    kept = value[len(value) - length :]
+    return field.marker + kept if isinstance(kept, str) else kept
+
+
+def _references(source: str, path: str) -> bool:
+    names = referenced_names(source)
+    return names is None or path.split(".", 1)[0] in names
+
+
+def _get(data: dict[str, Any], path: str) -> Any:
+    value: Any = data
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _set(data: dict[str, Any], path: str, value: Any) -> dict[str, Any]:
+    """Returns a copy of `data` with `path` set, copying only the dicts on the path."""
+    key, _, rest = path.partition(".")
+    copied = dict(data)
+    copied[key] = _set(data[key], rest, value) if rest else value
+    return copied
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import csv
 import json
+from collections import deque
+from collections.abc import Iterator
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import IO, TYPE_CHECKING, Any, Optional
 
 import click
-from pydantic.json import pydantic_encoder
 
-from drtail_prompt.core import load_prompt
-from drtail_prompt.exception import PromptValidationError
-from drtail_prompt.schema import BasicPromptSchema
+from drtail_prompt import stats
+from drtail_prompt.exception import DrTailPromptBaseException, PromptValidationError
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from drtail_prompt.core import Prompt
+
+# Commands import pydantic, PyYAML and Jinja2 (through drtail_prompt.core) only
+# when they run, to keep CLI startup fast.
 
 
 @click.group()
@@ -18,6 +28,29 @@ def cli() -> None:
     pass
 
 
+def _parse_value(value: str) -> Any:
+    # Try to parse value as JSON first, fallback to string
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def _parse_set_params(set_params: tuple[str, ...]) -> dict[str, Any]:
+    # Convert set parameters to dictionary
+    inputs: dict[str, Any] = {}
+    for param in set_params:
+        try:
+            key, value = param.split("=", 1)
+            inputs[key] = _parse_value(value)
+        except ValueError:
+            click.echo(
+                f"Error: Invalid parameter format '{param}'. Use 'key=value' format.",
+            )
+            raise
+    return inputs
+
+
 @cli.group()
 def meta() -> None:
     """Controls library itself."""
@@ -41,44 +74,57 @@ def meta() -> None:
         "Set input parameters in the format 'key=value'. Can be used multiple times."
     ),
 )
-def validate(prompt_path: Path, set_params: tuple[str, ...]) -> None:
+@click.option(
+    "--analyze",
+    is_flag=True,
+    help="Report the static render cost: loop depth, filters and estimated size.",
+)
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    help="Print only the render-cost report, as JSON. Implies --analyze.",
+)
+@click.option(
+    "--list-length",
+    type=click.IntRange(min=0),
+    default=10,
+    help="Length assumed for iterated inputs without maxItems in the input schema.",
+)
+@click.option(
+    "--max-loop-depth",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Fail when a message nests loops deeper. Implies --analyze.",
+)
+@click.option(
+    "--max-estimated-size",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Fail when the estimated rendered size is larger. Implies --analyze.",
+)
+def validate(
+    prompt_path: Path,
+    set_params: tuple[str, ...],
+    analyze: bool,
+    as_json: bool,
+    list_length: int,
+    max_loop_depth: int | None,
+    max_estimated_size: int | None,
+) -> None:
     """Validate a prompt YAML file.
 
     PROMPT_PATH is the path to the prompt YAML file to validate.
     """
-    # Convert set parameters to dictionary
-    inputs: dict[str, Any] = {}
-    for param in set_params:
-        try:
-            key, value = param.split("=", 1)
-            # Try to parse value as JSON first, fallback to string
-            try:
-                value = json.loads(value)
-            except json.JSONDecodeError:
-                pass
-            inputs[key] = value
-        except ValueError:
-            click.echo(
-                f"Error: Invalid parameter format '{param}'. Use 'key=value' format.",
-            )
-            raise
+    from drtail_prompt.core import load_prompt
+
+    inputs = _parse_set_params(set_params)
 
     try:
         # Load and validate the prompt
         prompt = load_prompt(str(prompt_path), inputs=inputs if inputs else None)
-        click.echo(f"✅ Prompt validation successful: {prompt_path}")
-
-        # Print metadata if available
-        if prompt.metadata:
-            click.echo("\nMetadata:")
-            for key, value in prompt.metadata.items():
-                click.echo(f"  {key}: {value}")
-
-        # Print messages if available
-        if prompt.messages:
-            click.echo("\nMessages:")
-            for msg in prompt.messages:
-                click.echo(f"  [{msg.role}]: {msg.content[:100]}...")
+        if not as_json:
+            _echo_prompt(prompt_path, prompt)
 
     except PromptValidationError as e:
         click.echo(f"❌ Validation error: {e}", err=True)
@@ -87,6 +133,62 @@ def validate(prompt_path: Path, set_params: tuple[str, ...]) -> None:
         click.echo(f"❌ Unexpected error: {e}", err=True)
         raise
 
+    if (
+        analyze
+        or as_json
+        or max_loop_depth is not None
+        or max_estimated_size is not None
+    ):
+        _analyze(prompt_path, as_json, list_length, max_loop_depth, max_estimated_size)
+
+
+def _echo_prompt(prompt_path: Path, prompt: Prompt) -> None:
+    click.echo(f"✅ Prompt validation successful: {prompt_path}")
+
+    # Print metadata if available
+    if prompt.metadata:
+        click.echo("\nMetadata:")
+        for key, value in prompt.metadata.items():
+            click.echo(f"  {key}: {value}")
+
+    # Print messages if available
+    if prompt.messages:
+        click.echo("\nMessages:")
+        for msg in prompt.messages:
+            click.echo(f"  [{msg.role}]: {msg.content[:100]}...")
+
+
+def _analyze(
+    prompt_path: Path,
+    as_json: bool,
+    list_length: int,
+    max_loop_depth: int | None,
+    max_estimated_size: int | None,
+) -> None:
+    from drtail_prompt.analysis import analyze_prompt, format_analysis
+    from drtail_prompt.core import load_prompt
+
+    # Analyze the message templates, not a rendering of them
+    report = analyze_prompt(load_prompt(str(prompt_path)).data, list_length)
+    violations = []
+    if max_loop_depth is not None and report["loop_depth"] > max_loop_depth:
+        violations.append(
+            f"loop depth {report['loop_depth']} exceeds {max_loop_depth}",
+        )
+    if max_estimated_size is not None and report["estimated_size"] > max_estimated_size:
+        violations.append(
+            f"estimated size {report['estimated_size']} exceeds {max_estimated_size}",
+        )
+    report["violations"] = violations
+
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+    else:
+        click.echo("\nRender cost:")
+        click.echo(format_analysis(report))
+    if violations:
+        raise click.ClickException(f"{prompt_path}: {'; '.join(violations)}")
+
 
 @cli.command()
 @click.argument(
@@ -99,6 +201,9 @@ def generate_schema(output: Path | None = None) -> None:
 
     OUTPUT is the path to the output JSON schema file.
     """
+    from pydantic.json import pydantic_encoder
+
+    from drtail_prompt.schema import BasicPromptSchema
 
     # Generate JSON schema
     json_schema = BasicPromptSchema.model_json_schema()
@@ -114,6 +219,335 @@ def generate_schema(output: Path | None = None) -> None:
     click.echo(f"JSON schema generated successfully: {output}")
 
 
+# (row, rendered output line, error)
+RenderResult = tuple[int, Optional[str], Optional[str]]
+
+# Prompt loaded once per render worker process
+_render_prompt: Prompt | None = None
+_render_output_format: str = "{}"
+
+
+def _init_render_worker(prompt_path: str) -> None:
+    from drtail_prompt.core import load_prompt
+
+    global _render_prompt, _render_output_format
+    _render_prompt = load_prompt(prompt_path)
+    # The structured output format is identical for every row, serialize it once.
+    _render_output_format = json.dumps(_render_prompt.structured_output_format)
+
+
+def _init_render_process(prompt_path: str) -> None:
+    # Forked workers inherit the parent's statistics, start from scratch
+    stats.registry.reset()
+    _init_render_worker(prompt_path)
+
+
+def _render_batch_in_process(
+    batch: list[tuple[int, Any]],
+) -> tuple[list[RenderResult], stats.StatsRegistry]:
+    """Renders a batch in a worker process and hands its statistics back."""
+    return _render_batch(batch), stats.registry.drain()
+
+
+def _render_batch(batch: list[tuple[int, Any]]) -> list[RenderResult]:
+    """
+    Renders `(row, inputs)` pairs, where inputs are a JSONL line or a parsed CSV
+    record, into `(row, output_line, error)` triples.
+    """
+    assert _render_prompt is not None
+    results: list[RenderResult] = []
+    for row, inputs in batch:
+        try:
+            if isinstance(inputs, str):
+                inputs = json.loads(inputs)
+            if not isinstance(inputs, dict):
+                raise PromptValidationError("Input row should be a JSON object")
+            messages = _render_prompt.with_inputs(inputs).messages_dict
+        except (json.JSONDecodeError, DrTailPromptBaseException) as e:
+            results.append((row, None, str(e)))
+            continue
+        except Exception as e:
+            # e.g. a filter failing on this row's values, the other rows go on
+            results.append((row, None, f"{type(e).__name__}: {e}"))
+            continue
+        line = (
+            f'{{"row": {row}, "messages": {json.dumps(messages)}, '
+            f'"structured_output_format": {_render_output_format}}}'
+        )
+        results.append((row, line, None))
+    return results
+
+
+def _read_rows(
+    input_file: IO[str],
+    input_format: str,
+) -> Iterator[tuple[int, Any]]:
+    if input_format == "csv":
+        # Cells stay strings, the input model coerces them to its field types
+        for row, record in enumerate(csv.DictReader(input_file), start=1):
+            yield row, record
+        return
+
+    # JSONL lines are parsed by the workers
+    for row, line in enumerate(input_file, start=1):
+        if line.strip():
+            yield row, line
+
+
+def _render_in_processes(
+    prompt_path: str,
+    batches: Iterator[list[tuple[int, Any]]],
+    workers: int,
+) -> Iterator[list[RenderResult]]:
+    """Renders batches across a process pool, yielding results in input order."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_render_process,
+        initargs=(prompt_path,),
+    ) as executor:
+        # A bounded window of in-flight batches keeps memory flat
+        pending: deque[Future[tuple[list[RenderResult], stats.StatsRegistry]]] = deque()
+        for batch in batches:
+            pending.append(executor.submit(_render_batch_in_process, batch))
+            if len(pending) >= workers * 2:
+                results, worker_stats = pending.popleft().result()
+                stats.registry.merge(worker_stats)
+                yield results
+        while pending:
+            results, worker_stats = pending.popleft().result()
+            stats.registry.merge(worker_stats)
+            yield results
+
+
+def _batches(
+    rows: Iterator[tuple[int, Any]],
+    batch_size: int,
+) -> Iterator[list[tuple[int, Any]]]:
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+
+@cli.command()
+@click.argument(
+    "prompt_path",
+    type=click.Path(
+        exists=True,
+        dir_okay=False,
+        path_type=Path,
+    ),  # type: ignore
+)
+@click.option(
+    "--input",
+    "-i",
+    "input_file",
+    type=click.File("r"),
+    default="-",
+    help="JSONL or CSV file with one set of inputs per row. Defaults to stdin.",
+)
+@click.option(
+    "--input-format",
+    type=click.Choice(["jsonl", "csv"]),
+    default=None,
+    help="Input file format. Inferred from the file extension, defaults to jsonl.",
+)
+@click.option(
+    "--output",
+    "-o",
+    "output_file",
+    type=click.File("w"),
+    default="-",
+    help="JSONL file to write rendered rows to. Defaults to stdout.",
+)
+@click.option(
+    "--errors",
+    "errors_file",
+    type=click.File("w"),
+    default=None,
+    help="JSONL file to write rows that fail validation to. Defaults to stderr.",
+)
+@click.option(
+    "--workers",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=256,
+    help="Number of rows sent to a worker at once.",
+)
+@click.option(
+    "--stats",
+    "stats_file",
+    type=click.File("w"),
+    default=None,
+    help="File to dump render statistics to, in Prometheus text format.",
+)
+def render(
+    prompt_path: Path,
+    input_file: IO[str],
+    input_format: str | None,
+    output_file: IO[str],
+    errors_file: IO[str] | None,
+    workers: int,
+    batch_size: int,
+    stats_file: IO[str] | None,
+) -> None:
+    """Render a prompt over many inputs, e.g. to build provider batch files.
+
+    PROMPT_PATH is the path to the prompt YAML file to render. Each output line
+    holds the row number, the rendered `messages` and the
+    `structured_output_format`, in input order. Rows that fail validation are
+    written to the errors file instead.
+    """
+    if input_format is None:
+        input_format = "csv" if input_file.name.endswith(".csv") else "jsonl"
+
+    batches = _batches(_read_rows(input_file, input_format), batch_size)
+    rendered = failed = 0
+
+    def write(results: list[RenderResult]) -> None:
+        nonlocal rendered, failed
+        for row, line, error in results:
+            if line is not None:
+                output_file.write(line + "\n")
+                rendered += 1
+            else:
+                click.echo(
+                    json.dumps({"row": row, "error": error}),
+                    file=errors_file,
+                    err=errors_file is None,
+                )
+                failed += 1
+
+    # Load in this process too, so that an invalid prompt fails before any work
+    _init_render_worker(str(prompt_path))
+    if workers == 1:
+        for batch in batches:
+            write(_render_batch(batch))
+    else:
+        for results in _render_in_processes(str(prompt_path), batches, workers):
+            write(results)
+
+    output_file.flush()
+    click.echo(f"Rendered {rendered} rows, {failed} failed", err=True)
+    if stats_file is not None:
+        stats_file.write(stats.registry.to_prometheus())
+
+
+@cli.command()
+@click.argument(
+    "prompt_path",
+    type=click.Path(
+        exists=True,
+        dir_okay=False,
+        path_type=Path,
+    ),  # type: ignore
+)
+@click.option(
+    "--set",
+    "set_params",
+    multiple=True,
+    help=(
+        "Set input parameters in the format 'key=value'. Can be used multiple times."
+    ),
+)
+@click.option(
+    "--inputs",
+    "inputs_file",
+    type=click.File("r"),
+    default=None,
+    help="JSON file with the input parameters. `--set` values take precedence.",
+)
+@click.option(
+    "--iterations",
+    "-n",
+    type=click.IntRange(min=1),
+    default=100,
+    help="Number of times the prompt is loaded and rendered.",
+)
+@click.option(
+    "--sort",
+    type=click.Choice(["cumulative", "tottime", "ncalls"]),
+    default="cumulative",
+    help="Sort order of the hot function table.",
+)
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    default=20,
+    help="Number of hot functions and allocation sites to print.",
+)
+@click.option(
+    "--pstats",
+    "pstats_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="File to dump the cProfile statistics to, e.g. for snakeviz.",
+)
+@click.option(
+    "--collapsed",
+    "collapsed_file",
+    type=click.File("w"),
+    default=None,
+    help="File to write collapsed stacks to, e.g. for flamegraph.pl or speedscope.",
+)
+def profile(
+    prompt_path: Path,
+    set_params: tuple[str, ...],
+    inputs_file: IO[str] | None,
+    iterations: int,
+    sort: str,
+    limit: int,
+    pstats_path: Path | None,
+    collapsed_file: IO[str] | None,
+) -> None:
+    """Profile loading and rendering a prompt.
+
+    PROMPT_PATH is the path to the prompt YAML file to profile. The prompt is
+    loaded and rendered `--iterations` times, after one warm-up run, and the
+    per-phase timings, the hottest functions and the top allocation sites are
+    printed.
+    """
+    from drtail_prompt import profiling
+    from drtail_prompt.core import load_prompt
+
+    inputs: dict[str, Any] = json.load(inputs_file) if inputs_file else {}
+    inputs.update(_parse_set_params(set_params))
+
+    def run() -> Prompt:
+        return load_prompt(str(prompt_path), inputs=inputs if inputs else None)
+
+    # Warm up caches and fail early on an invalid prompt
+    run()
+
+    # Each profiler runs on its own, so that they don't skew each other
+    timer = profiling.profile_phases(run, iterations)
+    click.echo(f"Phase timings ({iterations} iterations, nested phases included):")
+    click.echo(profiling.format_phases(timer, iterations))
+
+    profiler = profiling.profile_cpu(run, iterations)
+    click.echo("\nHot functions:")
+    click.echo(profiling.format_cpu(profiler, sort, limit))
+    if pstats_path is not None:
+        profiler.dump_stats(pstats_path)
+        click.echo(f"cProfile statistics written to {pstats_path}")
+
+    snapshot, peak = profiling.profile_memory(run, iterations)
+    click.echo("\nTop allocations still held by the loaded prompts:")
+    click.echo(profiling.format_memory(snapshot, peak, limit))
+
+    if collapsed_file is not None:
+        stacks = profiling.collapsed_stacks(run, iterations)
+        for frames, microseconds in sorted(stacks.items()):
+            collapsed_file.write(f"{frames} {microseconds}\n")
+        click.echo(f"\nCollapsed stacks written to {collapsed_file.name}")
+
+
 @cli.command()
 def version() -> None:
     """Print the version of the library."""
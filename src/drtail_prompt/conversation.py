@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+from collections import deque
+from collections.abc import Iterator
+from typing import Any
+
+from drtail_prompt.budget import get_token_counter
+from drtail_prompt.core import FrozenDict, Prompt
+from drtail_prompt.exception import PromptBudgetExceededError
+
+
+class _Turn:
+    """Messages from one user message up to the next, serialized as appended."""
+
+    __slots__ = ("json", "messages", "size")
+
+    def __init__(self) -> None:
+        self.messages: list[FrozenDict] = []
+        self.json = ""
+        self.size = 0
+
+
+class Conversation:
+    """
+    Multi-turn conversation on top of a rendered prompt.
+
+    The prompt's rendered messages form a fixed prefix, serialized once along
+    with the static part of the request `body`. Appending a message only
+    serializes that message, and old turns are evicted from the front once the
+    conversation exceeds `max_size` (in `unit`, see `budget`) or `max_turns`.
+    A turn starts at each user message, so the window never starts with a
+    dangling assistant reply.
+    """
+
+    def __init__(
+        self,
+        prompt: Prompt,
+        *,
+        body: dict[str, Any] | None = None,
+        messages_key: str = "input",
+        max_size: int | None = None,
+        max_turns: int | None = None,
+        unit: str = "chars",
+    ) -> None:
+        self.prefix: tuple[FrozenDict, ...] = prompt.rendered.messages_dict
+        self.max_size = max_size
+        self.max_turns = max_turns
+        self.evicted_turns = 0
+        self._counter = get_token_counter(unit)
+        self._unit = unit
+        self._turns: deque[_Turn] = deque()
+        self._turns_size = 0
+
+        self.prefix_size = sum(self._counter(m["content"]) for m in self.prefix)
+        if max_size is not None and self.prefix_size > max_size:
+            raise PromptBudgetExceededError(
+                f"Prompt is {self.prefix_size} {unit}, over the conversation "
+                f"budget of {max_size} {unit}",
+            )
+
+        body = dict(body or {})
+        if messages_key in body:
+            raise ValueError(f"'{messages_key}' is filled by the conversation")
+        head = json.dumps(body)[:-1]
+        self._prefix_json = ", ".join(json.dumps(m) for m in self.prefix)
+        self._body_head = f"{head}{', ' if body else ''}{json.dumps(messages_key)}: ["
+
+    @property
+    def size(self) -> int:
+        """Size of the prefix and the current window of turns, in `unit`."""
+        return self.prefix_size + self._turns_size
+
+    @property
+    def turns(self) -> int:
+        return len(self._turns)
+
+    def append(self, role: str, content: str) -> None:
+        """
+        Appends a message, evicting the oldest turns if needed. Raises
+        `PromptBudgetExceededError`, leaving the conversation untouched, when
+        the prefix and the current turn alone exceed `max_size`.
+        """
+        message = FrozenDict(role=role, content=content)
+        size = self._counter(content)
+        new_turn = role == "user" or not self._turns
+        turn_size = size if new_turn else self._turns[-1].size + size
+        if self.max_size is not None and self.prefix_size + turn_size > self.max_size:
+            raise PromptBudgetExceededError(
+                f"Turn is {turn_size} {self._unit}, over what the conversation "
+                f"budget of {self.max_size} {self._unit} leaves after the prompt",
+            )
+
+        if new_turn:
+            self._turns.append(_Turn())
+        turn = self._turns[-1]
+        serialized = json.dumps(message)
+        turn.json = f"{turn.json}, {serialized}" if turn.messages else serialized
+        turn.messages.append(message)
+        turn.size += size
+        self._turns_size += size
+        self._evict()
+
+    def add_user(self, content: str) -> None:
+        self.append("user", content)
+
+    def add_assistant(self, content: str) -> None:
+        self.append("assistant", content)
+
+    def _evict(self) -> None:
+        # The last turn always fits, it was checked by `append`
+        while len(self._turns) > 1 and (
+            (self.max_turns is not None and len(self._turns) > self.max_turns)
+            or (self.max_size is not None and self.size > self.max_size)
+        ):
+            self._turns_size -= self._turns.popleft().size
+            self.evicted_turns += 1
+
+    def __iter__(self) -> Iterator[FrozenDict]:
+        yield from self.prefix
+        for turn in self._turns:
+            yield from turn.messages
+
+    @property
+    def messages(self) -> list[FrozenDict]:
+        """Read-only messages of the prefix and the current window of turns."""
+        return list(self)
+
+    def _messages_json(self) -> str:
+        turns = ", ".join(turn.json for turn in self._turns)
+        if self._prefix_json and turns:
+            return f"{self._prefix_json}, {turns}"
+        return self._prefix_json or turns
+
+    def messages_json(self) -> str:
+        """Returns the messages as a JSON array, from the cached serializations."""
+        return f"[{self._messages_json()}]"
+
+    def request_body(self) -> str:
+        """Returns the JSON request body: `body` with the messages under `messages_key`."""
+        return f"{self._body_head}{self._messages_json()}]}}"
@@ -1,24 +1,112 @@
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Any
+import os
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, NoReturn
 
 import yaml
 from pydantic import BaseModel, ValidationError
 
+from drtail_prompt import resources, stats, tracing
 from drtail_prompt.exception import PromptValidationError
-from drtail_prompt.schema import BasicPromptSchema, Message
+from drtail_prompt.schema import BasicPromptSchema, Input, Message
+from drtail_prompt.stream import StreamEvent, aparse_stream, parse_stream
+
+if TYPE_CHECKING:
+    from importlib.abc import Traversable
 
 
 def slugify_name(name: str) -> str:
     return name.lower().replace(" ", "-")
 
 
+class FrozenDict(dict[str, Any]):
+    """
+    Read-only `dict`. Being a real `dict` subclass, it can be handed to
+    provider clients and `json.dumps` without being copied first.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> NoReturn:
+        raise TypeError(f"'{type(self).__name__}' object is read-only")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (type(self), (dict(self),))
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class RenderedPrompt:
+    """
+    Frozen snapshot of a rendered prompt. `messages_dict`, `metadata` and
+    `structured_output_format` are computed once and exposed as read-only
+    views that can be passed straight to an OpenAI-style client.
+    """
+
+    __slots__ = ("messages_dict", "metadata", "structured_output_format")
+
+    messages_dict: tuple[FrozenDict, ...]
+    metadata: FrozenDict
+    structured_output_format: FrozenDict
+
+    def __init__(
+        self,
+        messages_dict: list[dict[str, str]],
+        metadata: dict[str, Any],
+        structured_output_format: dict[str, Any],
+    ) -> None:
+        object.__setattr__(self, "messages_dict", freeze(messages_dict))
+        object.__setattr__(self, "metadata", freeze(metadata))
+        object.__setattr__(
+            self,
+            "structured_output_format",
+            freeze(structured_output_format),
+        )
+
+    def __setattr__(self, name: str, value: Any) -> NoReturn:
+        raise AttributeError(f"'{type(self).__name__}' object is immutable")
+
+    def __delattr__(self, name: str) -> NoReturn:
+        raise AttributeError(f"'{type(self).__name__}' object is immutable")
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(messages_dict={self.messages_dict!r}, "
+            f"metadata={self.metadata!r})"
+        )
+
+
 class Prompt(BaseModel):
     data: BasicPromptSchema
 
-    # TODO: define public methods
-    ...
+    @cached_property
+    def rendered(self) -> RenderedPrompt:
+        """
+        Frozen, cached view of the rendered prompt. Computed on first access;
+        later changes to `data` are not reflected.
+        """
+        return RenderedPrompt(
+            messages_dict=self.messages_dict,
+            metadata=self.metadata,
+            structured_output_format=self.structured_output_format,
+        )
 
     @property
     def messages(self) -> list[Message]:
@@ -50,23 +138,152 @@ class Prompt(BaseModel):
         if not self.data.output:
             return {}
 
-        if not self.data.output.instance:
+        if self.data.output.type == "jsonschema":
+            schema = self.data.output.schema_ or {}
+            name = schema.get("title", "Output")
+        elif self.data.output.instance:
+            schema = self.data.output.instance.model_json_schema()
+            name = schema["title"]
+        else:
             raise PromptValidationError("Output instance is not set")
 
-        schema = self.data.output.instance.model_json_schema()
         return {
             "format": {
                 "type": "json_schema",
-                "name": schema["title"],
+                "name": name,
                 "schema": schema,
             },
         }
 
+    def with_inputs(self, inputs: dict[str, Any] | BaseModel) -> Prompt:
+        """
+        Returns a new prompt rendered with `inputs`, leaving this one untouched.
+        Use it to render a prompt loaded once (without inputs) many times.
+        """
+        data = self.data.model_copy(
+            update={"messages": [m.model_copy() for m in self.data.messages]},
+        )
+        return Prompt(data=interpolate_inputs(data, inputs))
+
+    @property
+    def output_model(self) -> type[BaseModel]:
+        if not self.data.output or not self.data.output.instance:
+            raise PromptValidationError("Output instance is not set")
+        return self.data.output.instance  # type: ignore[return-value]
+
+    def parse_stream(self, chunks: Iterable[str]) -> Iterator[StreamEvent]:
+        """
+        Parses a streamed structured output response incrementally.
+
+        Yields a `StreamEvent` for each top-level field and each list item as
+        soon as it is complete and valid, then a final event with path `()` and
+        the validated output model. Raises `PromptValidationError` as soon as
+        the stream violates the output schema, so that the generation can be
+        cancelled early.
+        """
+        return parse_stream(self.output_model, chunks)
+
+    def aparse_stream(self, chunks: AsyncIterable[str]) -> AsyncIterator[StreamEvent]:
+        """Async variant of `parse_stream`."""
+        return aparse_stream(self.output_model, chunks)
+
+
+def interpolate_inputs(
+    prompt: BasicPromptSchema,
+    inputs: dict[str, Any] | BaseModel,
+) -> BasicPromptSchema:
+    """Validates `inputs` against the prompt input model and renders the messages."""
+    if not prompt.input:
+        raise PromptValidationError("Input schema is not defined in the prompt")
+
+    with tracing.span(
+        tracing.VALIDATE_INPUT,
+        prompt_name=prompt.name,
+        prompt_version=prompt.version,
+    ):
+        try:
+            if isinstance(inputs, BaseModel):
+                inputs = _dump_input_model(prompt.input, inputs)
+
+            try:
+                validated_inputs = prompt.input.validate_data(inputs)
+            except ValidationError as e:
+                raise PromptValidationError(e) from e
+        except PromptValidationError:
+            stats.registry.record_validation_failure(prompt.name, prompt.version)
+            raise
+
+    return prompt.interpolate(validated_inputs)
+
+
+def _dump_input_model(prompt_input: Input, inputs: BaseModel) -> dict[str, Any]:
+    """
+    Dumps an input model instance. With a pydantic input, it must be the
+    prompt's own model; an inline JSON schema validates the dumped data.
+    """
+    if prompt_input.type == "jsonschema":
+        return inputs.model_dump()
+
+    prompt_input_instance = prompt_input.instance
+    if not prompt_input_instance:
+        raise PromptValidationError(
+            "Input model is not defined in the prompt",
+        )
+    if inputs.model_json_schema() != prompt_input_instance.model_json_schema():
+        raise PromptValidationError(
+            "Input model is not the same as the model defined in the prompt",
+        )
+    return inputs.model_dump()
+
 
-def load_prompt(path: str, inputs: dict[str, Any] | BaseModel | None = None) -> Prompt:
-    filepath = Path(path)
-    with open(filepath) as file:
-        yaml_data = yaml.safe_load(file)
+def load_prompt(
+    path: str | os.PathLike[str] | Traversable,
+    inputs: dict[str, Any] | BaseModel | None = None,
+) -> Prompt:
+    """
+    Loads a prompt from a file path, or from a traversable such as
+    `importlib.resources.files("package") / "prompt.yaml"`, which is read
+    directly, e.g. from a zip archive.
+    """
+    with tracing.span(tracing.LOAD_PROMPT, path=str(path)) as load_span:
+        with tracing.span(tracing.READ_FILE) as read_span:
+            if isinstance(path, (str, os.PathLike)):
+                with open(path) as file:
+                    text = file.read()
+            else:
+                text = path.read_text(encoding="utf-8")
+            read_span.set_attribute("bytes", stats.utf8_size(text))
+
+        return _load_prompt_text(text, inputs, load_span)
+
+
+def load_package_prompt(
+    package: str,
+    name: str,
+    inputs: dict[str, Any] | BaseModel | None = None,
+) -> Prompt:
+    """
+    Loads prompt resource `name` (e.g. `prompts/summary.yaml`) of `package`,
+    without extracting it from a wheel or zip archive. Archive listings and
+    resource texts are cached, see `drtail_prompt.resources`.
+    """
+    with tracing.span(tracing.LOAD_PROMPT, path=f"{package}:{name}") as load_span:
+        with tracing.span(tracing.READ_FILE) as read_span:
+            text = resources.read_resource(package, name)
+            read_span.set_attribute("bytes", stats.utf8_size(text))
+
+        return _load_prompt_text(text, inputs, load_span)
+
+
+def _load_prompt_text(
+    text: str,
+    inputs: dict[str, Any] | BaseModel | None,
+    load_span: tracing.Span | tracing._NoopSpan,
+) -> Prompt:
+    with tracing.span(tracing.PARSE_YAML):
+        yaml_data = yaml.safe_load(text)
+
+    with tracing.span(tracing.VALIDATE_SCHEMA):
         try:
             prompt = BasicPromptSchema.model_validate(yaml_data)
         except ValidationError as e:
@@ -74,25 +291,13 @@ def load_prompt(path: str, inputs: dict[str, Any] | BaseModel | None = None) ->
         except ModuleNotFoundError as e:
             raise PromptValidationError(e) from e
 
-    if inputs:
-        if not prompt.input:
-            raise PromptValidationError("Input schema is not defined in the prompt")
-
-        if isinstance(inputs, BaseModel):
-            prompt_input_instance = prompt.input.instance
-            if not prompt_input_instance:
-                raise PromptValidationError("Input model is not defined in the prompt")
-            if inputs.model_json_schema() != prompt_input_instance.model_json_schema():
-                raise PromptValidationError(
-                    "Input model is not the same as the model defined in the prompt",
-                )
-            inputs = inputs.model_dump()
-
-        try:
-            validated_inputs = prompt.input.instance_validate(inputs)
-        except ValidationError as e:
-            raise PromptValidationError(e) from e
+    prompt.intern_values()
+    stats.registry.record_load(prompt.name, prompt.version)
+    load_span.set_attribute("prompt_name", prompt.name)
+    load_span.set_attribute("prompt_version", prompt.version)
+    load_span.set_attribute("message_count", len(prompt.messages))
 
-        prompt.interpolate(validated_inputs.model_dump())
+    if inputs:
+        interpolate_inputs(prompt, inputs)
 
     return Prompt(data=prompt)
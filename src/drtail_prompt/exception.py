@@ -8,3 +8,11 @@ class PromptValidationError(DrTailPromptBaseException):
 
 class PromptVersionMismatchError(DrTailPromptBaseException):
     pass
+
+
+class PromptBudgetExceededError(DrTailPromptBaseException):
+    pass
+
+
+class PromptRenderLimitError(DrTailPromptBaseException):
+    pass
@@ -0,0 +1,210 @@
+"""
+Per-render limits on wall time, output size and loop iterations, so that a
+pathological template (e.g. nested loops over a large input) fails fast
+instead of stalling the worker rendering it.
+
+Templates are compiled with every `{% for %}` iterable wrapped by
+`guard_iter`, which is a no-op unless a render runs under `limit_render`.
+Limits are cooperative: they are checked on each loop iteration and each
+chunk of output, so a single long call (e.g. a filter over a huge input)
+is only cut off once it returns.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from jinja2 import nodes
+from jinja2.compiler import CodeGenerator, Frame
+
+from drtail_prompt.exception import PromptRenderLimitError
+
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+T = TypeVar("T")
+
+# Version of the code `GuardedCodeGenerator` emits. Bump it on every change,
+# bytecode cached by an older version is ignored.
+CODE_VERSION = 2
+
+_defaults: dict[str, Any] = {
+    "max_seconds": None,
+    "max_output_bytes": None,
+    "max_loop_iterations": None,
+}
+
+
+def set_default_limits(
+    *,
+    max_seconds: float | None = None,
+    max_output_bytes: int | None = None,
+    max_loop_iterations: int | None = None,
+) -> None:
+    """
+    Sets process-wide limits applied to every render. A prompt's own `limits`
+    can only tighten them.
+    """
+    _defaults.update(
+        max_seconds=max_seconds,
+        max_output_bytes=max_output_bytes,
+        max_loop_iterations=max_loop_iterations,
+    )
+
+
+class RenderGuard:
+    """
+    Limits of one render. Wall time covers the whole render, output size (in
+    UTF-8 bytes) and loop iterations are counted per rendered message.
+    """
+
+    __slots__ = (
+        "deadline",
+        "iterations",
+        "max_loop_iterations",
+        "max_output_bytes",
+        "max_seconds",
+    )
+
+    def __init__(
+        self,
+        max_seconds: float | None,
+        max_output_bytes: int | None,
+        max_loop_iterations: int | None,
+    ) -> None:
+        self.max_seconds = max_seconds
+        self.max_output_bytes = max_output_bytes
+        self.max_loop_iterations = max_loop_iterations
+        self.deadline = (
+            None if max_seconds is None else time.perf_counter() + max_seconds
+        )
+        self.iterations = 0
+
+    def check_time(self) -> None:
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise PromptRenderLimitError(
+                f"Render exceeded its time limit of {self.max_seconds}s",
+            )
+
+    def iterate(self, iterable: Iterable[T]) -> Iterator[T]:
+        for item in iterable:
+            self.iterations += 1
+            if (
+                self.max_loop_iterations is not None
+                and self.iterations > self.max_loop_iterations
+            ):
+                raise PromptRenderLimitError(
+                    f"Render exceeded its limit of {self.max_loop_iterations} loop iterations",
+                )
+            self.check_time()
+            yield item
+
+    def render(self, template: Template, data: dict[str, Any]) -> str:
+        self.iterations = 0
+        self.check_time()
+        chunks = []
+        size = 0
+        for chunk in template.generate(**data):
+            # Encoded size in UTF-8, ASCII chunks have as many bytes as chars
+            size += len(chunk) if chunk.isascii() else len(chunk.encode("utf-8"))
+            if self.max_output_bytes is not None and size > self.max_output_bytes:
+                raise PromptRenderLimitError(
+                    f"Rendered message exceeded its limit of {self.max_output_bytes} bytes",
+                )
+            self.check_time()
+            chunks.append(chunk)
+        return "".join(chunks)
+
+
+_active: ContextVar[RenderGuard | None] = ContextVar("render_guard", default=None)
+
+
+def _tightest(limit: Any, default: Any) -> Any:
+    if limit is None or default is None:
+        return default if limit is None else limit
+    return min(limit, default)
+
+
+@contextmanager
+def limit_render(
+    max_seconds: float | None = None,
+    max_output_bytes: int | None = None,
+    max_loop_iterations: int | None = None,
+) -> Iterator[RenderGuard | None]:
+    """
+    Enforces the given limits, tightened by the defaults, on the templates
+    rendered with `render` inside the block. Yields `None` when no limit
+    applies, leaving rendering untouched.
+    """
+    guard = RenderGuard(
+        _tightest(max_seconds, _defaults["max_seconds"]),
+        _tightest(max_output_bytes, _defaults["max_output_bytes"]),
+        _tightest(max_loop_iterations, _defaults["max_loop_iterations"]),
+    )
+    if (
+        guard.max_seconds is None
+        and guard.max_output_bytes is None
+        and guard.max_loop_iterations is None
+    ):
+        yield None
+        return
+    token = _active.set(guard)
+    try:
+        yield guard
+    finally:
+        _active.reset(token)
+
+
+def render(template: Template, data: dict[str, Any]) -> str:
+    """Renders `template`, enforcing the limits of the current render, if any."""
+    guard = _active.get()
+    if guard is None:
+        return template.render(**data)
+    return guard.render(template, data)
+
+
+def guard_iter(iterable: Iterable[T]) -> Iterable[T]:
+    """Called by compiled templates on every `{% for %}` iterable."""
+    guard = _active.get()
+    if guard is None:
+        return iterable
+    return guard.iterate(iterable)
+
+
+class GuardedCodeGenerator(CodeGenerator):
+    """
+    Compiles `{% for x in items %}` as `for x in environment.guard_iter(items)`.
+
+    A recursive loop is compiled as a `loop(reciter, ...)` function, called
+    for the top-level items and for each `loop(children)`, so its `reciter`
+    is guarded instead.
+    """
+
+    _guard_reciter = False
+
+    def visit_For(self, node: nodes.For, frame: Frame) -> None:
+        if node.recursive:
+            self._guard_reciter = True
+            try:
+                super().visit_For(node, frame)
+            finally:
+                self._guard_reciter = False
+            return
+        node.iter = nodes.Call(
+            nodes.EnvironmentAttribute("guard_iter"),
+            [node.iter],
+            [],
+            None,
+            None,
+            lineno=node.lineno,
+        )
+        super().visit_For(node, frame)
+
+    def write(self, x: str) -> None:
+        if self._guard_reciter and x == "reciter":
+            x = "environment.guard_iter(reciter)"
+        super().write(x)
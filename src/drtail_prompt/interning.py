@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import sys
+import threading
+from collections.abc import Hashable
+from typing import Any, TypeVar
+from weakref import WeakValueDictionary
+
+T = TypeVar("T")
+
+
+class InternPool:
+    """
+    Deduplicates values shared by loaded prompts, e.g. every published version
+    of a prompt: identical strings through `sys.intern`, and identical records
+    (authors, metadata) by handing out the first instance loaded.
+
+    Pooled records are weakly referenced, so they are dropped along with the
+    last prompt using them. Shared records must be treated as read-only.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._records: dict[str, WeakValueDictionary[Hashable, Any]] = {}
+        self._hits: dict[str, int] = {}
+        self._saved_bytes = 0
+        self.enabled = True
+
+    def string(self, value: str) -> str:
+        interned = sys.intern(value)
+        if interned is not value:
+            with self._lock:
+                self._hits["strings"] = self._hits.get("strings", 0) + 1
+                self._saved_bytes += sys.getsizeof(value)
+        return interned
+
+    def record(self, kind: str, key: Hashable, value: T) -> T:
+        """Returns the pooled instance of `kind` with `key`, pooling `value` if none."""
+        with self._lock:
+            records = self._records.setdefault(kind, WeakValueDictionary())
+            existing = records.get(key)
+            if existing is None:
+                records[key] = value
+                return value
+            if existing is value:
+                return value
+            self._hits[kind] = self._hits.get(kind, 0) + 1
+            self._saved_bytes += _deep_size(value)
+            return existing  # type: ignore[no-any-return]
+
+    def report(self) -> dict[str, Any]:
+        """Returns the deduplicated counts per kind and the bytes they saved."""
+        with self._lock:
+            return {
+                "deduplicated": dict(sorted(self._hits.items())),
+                "pooled": {
+                    kind: len(records)
+                    for kind, records in sorted(self._records.items())
+                },
+                "saved_bytes": self._saved_bytes,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._hits.clear()
+            self._saved_bytes = 0
+
+
+def _deep_size(value: Any) -> int:
+    """Approximate size of a record: the object, its `__dict__` and their values."""
+    size = sys.getsizeof(value)
+    attributes = getattr(value, "__dict__", None)
+    if attributes is not None:
+        size += sys.getsizeof(attributes)
+        size += sum(sys.getsizeof(v) for v in attributes.values())
+    extra = getattr(value, "__pydantic_extra__", None)
+    if extra:
+        size += sys.getsizeof(extra) + sum(sys.getsizeof(v) for v in extra.values())
+    return size
+
+
+pool = InternPool()
@@ -0,0 +1,510 @@
+"""
+Compiles inline JSON Schemas into validation closures.
+
+A schema is interpreted once by `compile_schema`; the returned validator only
+runs the checks the schema declares, without looking at the schema again.
+Supported keywords cover what structured outputs and pydantic generated
+schemas use: `type`, `enum`, `const`, `properties`, `required`,
+`additionalProperties`, `items`, `prefixItems`, string/number/array bounds,
+`pattern`, `anyOf`/`oneOf`/`allOf` and local `$ref`s. Annotation keywords
+(`title`, `description`, `default`, `format`, `discriminator`, ...) are
+ignored; any other keyword, or a keyword with a malformed value, is rejected
+at compile time.
+"""
+
+from __future__ import annotations
+
+import operator
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable
+
+from .exception import PromptValidationError
+
+Validator = Callable[[Any], None]
+
+ANNOTATIONS = frozenset(
+    {
+        "$schema",
+        "$id",
+        "$comment",
+        "$defs",
+        "definitions",
+        "title",
+        "description",
+        "default",
+        "examples",
+        "format",
+        "deprecated",
+        "readOnly",
+        "writeOnly",
+        # OpenAPI hint emitted by pydantic for discriminated unions, the
+        # `oneOf` next to it does the validation
+        "discriminator",
+    },
+)
+
+_TYPES: dict[str, Callable[[Any], bool]] = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, (list, tuple)),
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: (
+        (isinstance(value, int) and not isinstance(value, bool))
+        or (isinstance(value, float) and value.is_integer())
+    ),
+    "number": lambda value: (
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+    ),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+# Types checked with a single isinstance call
+_PYTHON_TYPES: dict[str, type | tuple[type, ...]] = {
+    "object": dict,
+    "array": (list, tuple),
+    "string": str,
+    "null": type(None),
+}
+
+
+class _Invalid(Exception):
+    """Raised by validators; containers prepend their key while unwinding."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.message = message
+        self.path: list[str] = []
+
+
+def compile_schema(schema: dict[str, Any]) -> Validator:
+    """
+    Returns a validator raising `PromptValidationError` when a value does not
+    match `schema`. Raises `ValueError` for unsupported or malformed schemas.
+    """
+    validate = _Compiler(schema).compile(schema)
+
+    def validator(value: Any) -> None:
+        try:
+            validate(value)
+        except _Invalid as e:
+            path = ".".join(reversed(e.path))
+            raise PromptValidationError(
+                f"Invalid value at '{path}': {e.message}" if path else e.message,
+            ) from None
+
+    return validator
+
+
+def _type_name(value: Any) -> str:
+    for name, check in _TYPES.items():
+        if check(value):
+            return name
+    return type(value).__name__
+
+
+class _Compiler:
+    def __init__(self, root: dict[str, Any]) -> None:
+        self.root = root
+        # Compiled `$ref` targets, filled lazily so recursive schemas terminate
+        self.refs: dict[str, Validator] = {}
+
+    def compile(self, schema: Any) -> Validator:
+        if schema is True or schema == {}:
+            return _accept
+        if schema is False:
+            return _reject
+        if not isinstance(schema, dict):
+            raise ValueError(f"Invalid JSON schema: {schema!r}")
+
+        _check_keywords(schema)
+
+        checks = [
+            compile_keywords(self, schema)
+            for keywords, compile_keywords in _COMPILERS
+            if not keywords.isdisjoint(schema)
+        ]
+        if not checks:
+            return _accept
+        if len(checks) == 1:
+            return checks[0]
+
+        def validate_all(value: Any) -> None:
+            for check in checks:
+                check(value)
+
+        return validate_all
+
+    def resolve(self, ref: str) -> Any:
+        if not ref.startswith("#"):
+            raise ValueError(f"Only local JSON schema references are supported: {ref}")
+        target: Any = self.root
+        for part in filter(None, ref[1:].split("/")):
+            part = part.replace("~1", "/").replace("~0", "~")
+            try:
+                target = target[int(part) if isinstance(target, list) else part]
+            except (KeyError, IndexError, ValueError, TypeError) as e:
+                raise ValueError(f"Unresolvable JSON schema reference: {ref}") from e
+        return target
+
+
+def _check_keywords(schema: dict[str, Any]) -> None:
+    unsupported = set(schema) - ANNOTATIONS - _KEYWORDS
+    if unsupported:
+        raise ValueError(
+            f"Unsupported JSON schema keywords: {', '.join(sorted(unsupported))}",
+        )
+    for keyword, value in schema.items():
+        shape = _SHAPES.get(keyword)
+        if shape is not None and not shape[0](value):
+            raise ValueError(
+                f"Invalid JSON schema: '{keyword}' should be {shape[1]}, got {value!r}",
+            )
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _accept(value: Any) -> None:
+    pass
+
+
+def _reject(value: Any) -> None:
+    raise _Invalid("no value is allowed here")
+
+
+def _ref(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    ref = schema["$ref"]
+    refs = compiler.refs
+    if ref not in refs:
+        # Placeholder for references to the schema being compiled
+        refs[ref] = lambda value: refs[ref](value)
+        refs[ref] = compiler.compile(compiler.resolve(ref))
+    return refs[ref]
+
+
+def _type(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    names = schema["type"]
+    if isinstance(names, str):
+        names = [names]
+    for name in names:
+        if name not in _TYPES:
+            raise ValueError(f"Unknown JSON schema type: {name}")
+    checks = tuple(_TYPES[name] for name in names)
+    expected = " or ".join(names)
+
+    if len(names) == 1 and names[0] in _PYTHON_TYPES:
+        python_type = _PYTHON_TYPES[names[0]]
+
+        def validate_python_type(value: Any) -> None:
+            if not isinstance(value, python_type):
+                raise _Invalid(f"expected {expected}, got {_type_name(value)}")
+
+        return validate_python_type
+
+    def validate_type(value: Any) -> None:
+        for check in checks:
+            if check(value):
+                return
+        raise _Invalid(f"expected {expected}, got {_type_name(value)}")
+
+    return validate_type
+
+
+def _enum(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    options = list(schema["enum"])
+
+    def validate_enum(value: Any) -> None:
+        for option in options:
+            # `==` alone would accept True for 1
+            if value == option and _type_name(value) == _type_name(option):
+                return
+        raise _Invalid(f"expected one of {options!r}, got {value!r}")
+
+    return validate_enum
+
+
+def _const(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    return _enum(compiler, {"enum": [schema["const"]]})
+
+
+def _object(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    properties = {
+        key: compiler.compile(subschema)
+        for key, subschema in schema.get("properties", {}).items()
+    }
+    required = tuple(schema.get("required", ()))
+    additional = schema.get("additionalProperties", True)
+    additional_check = None if additional is True else compiler.compile(additional)
+    forbid_additional = additional is False
+
+    def validate_object(value: Any) -> None:
+        if not isinstance(value, dict):
+            return
+        for key in required:
+            if key not in value:
+                raise _Invalid(f"missing required field '{key}'")
+        for key, item in value.items():
+            check = properties.get(key)
+            if check is None:
+                if additional_check is None:
+                    continue
+                if forbid_additional:
+                    raise _Invalid(f"unexpected field '{key}'")
+                check = additional_check
+            try:
+                check(item)
+            except _Invalid as e:
+                e.path.append(str(key))
+                raise
+
+    return validate_object
+
+
+def _array(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    prefix = [
+        compiler.compile(subschema) for subschema in schema.get("prefixItems", [])
+    ]
+    items = schema.get("items", True)
+    items_check = None if items is True else compiler.compile(items)
+
+    def validate_array(value: Any) -> None:
+        if not isinstance(value, (list, tuple)):
+            return
+        for index, item in enumerate(value):
+            check = prefix[index] if index < len(prefix) else items_check
+            if check is None:
+                continue
+            try:
+                check(item)
+            except _Invalid as e:
+                e.path.append(str(index))
+                raise
+
+    return validate_array
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_array(value: Any) -> bool:
+    return isinstance(value, (list, tuple))
+
+
+def _is_count(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _is_schema(value: Any) -> bool:
+    return isinstance(value, (bool, dict))
+
+
+def _is_string_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _is_multiple(value: Any, limit: Any) -> bool:
+    if isinstance(value, int) and isinstance(limit, int):
+        return value % limit == 0
+    # Compare the decimal numbers as written in JSON: 0.3 is a multiple of
+    # 0.1, although 0.3 / 0.1 is 2.9999999999999996 in binary floating point
+    try:
+        return Decimal(repr(value)) % Decimal(repr(limit)) == 0
+    except InvalidOperation:
+        return False
+
+
+def _is_unique(value: Any, limit: Any) -> bool:
+    if not limit:
+        return True
+    seen: list[Any] = []
+    for item in value:
+        if item in seen:
+            return False
+        seen.append(item)
+    return True
+
+
+# keyword: (applies to value, measure, limit check, error message)
+_BOUNDS: dict[
+    str,
+    tuple[
+        Callable[[Any], bool],
+        Callable[[Any], Any],
+        Callable[[Any, Any], bool],
+        str,
+    ],
+] = {
+    "minLength": (_TYPES["string"], len, operator.ge, "shorter than {limit}"),
+    "maxLength": (_TYPES["string"], len, operator.le, "longer than {limit}"),
+    "minItems": (_is_array, len, operator.ge, "fewer than {limit} items"),
+    "maxItems": (_is_array, len, operator.le, "more than {limit} items"),
+    "uniqueItems": (_is_array, _identity, _is_unique, "items are not unique"),
+    "minProperties": (_TYPES["object"], len, operator.ge, "fewer than {limit} fields"),
+    "maxProperties": (_TYPES["object"], len, operator.le, "more than {limit} fields"),
+    "minimum": (_is_number, _identity, operator.ge, "{value} < {limit}"),
+    "maximum": (_is_number, _identity, operator.le, "{value} > {limit}"),
+    "exclusiveMinimum": (_is_number, _identity, operator.gt, "{value} <= {limit}"),
+    "exclusiveMaximum": (_is_number, _identity, operator.lt, "{value} >= {limit}"),
+    "multipleOf": (
+        _is_number,
+        _identity,
+        _is_multiple,
+        "{value} is not a multiple of {limit}",
+    ),
+}
+
+
+def _bounds(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    """Compiles length, size, range and pattern keywords into a single check."""
+    bounds = [
+        (*_BOUNDS[keyword], schema[keyword]) for keyword in _BOUNDS if keyword in schema
+    ]
+    try:
+        pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+    except re.error as e:
+        raise ValueError(
+            f"Invalid JSON schema pattern {schema['pattern']!r}: {e}",
+        ) from e
+
+    def validate_bounds(value: Any) -> None:
+        for applies, measure, check, message, limit in bounds:
+            if applies(value):
+                measured = measure(value)
+                if not check(measured, limit):
+                    raise _Invalid(message.format(limit=limit, value=measured))
+        if pattern is not None and isinstance(value, str) and not pattern.search(value):
+            raise _Invalid(f"{value!r} does not match {pattern.pattern!r}")
+
+    return validate_bounds
+
+
+def _any_of(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    options = [compiler.compile(subschema) for subschema in schema["anyOf"]]
+
+    def validate_any_of(value: Any) -> None:
+        errors = []
+        for option in options:
+            try:
+                option(value)
+                return
+            except _Invalid as e:
+                errors.append(e)
+        # Report the error of the option that got the deepest
+        raise max(errors, key=lambda e: len(e.path))
+
+    return validate_any_of
+
+
+def _one_of(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    options = [compiler.compile(subschema) for subschema in schema["oneOf"]]
+
+    def validate_one_of(value: Any) -> None:
+        matches = 0
+        errors = []
+        for option in options:
+            try:
+                option(value)
+                matches += 1
+            except _Invalid as e:
+                errors.append(e)
+        if matches == 1:
+            return
+        if matches > 1:
+            raise _Invalid(f"matches {matches} schemas of oneOf, expected exactly one")
+        raise max(errors, key=lambda e: len(e.path))
+
+    return validate_one_of
+
+
+def _all_of(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    checks = [compiler.compile(subschema) for subschema in schema["allOf"]]
+
+    def validate_all_of(value: Any) -> None:
+        for check in checks:
+            check(value)
+
+    return validate_all_of
+
+
+def _not(compiler: _Compiler, schema: dict[str, Any]) -> Validator:
+    check = compiler.compile(schema["not"])
+
+    def validate_not(value: Any) -> None:
+        try:
+            check(value)
+        except _Invalid:
+            return
+        raise _Invalid("matches a schema it should not")
+
+    return validate_not
+
+
+# Keyword compilers and the keywords they handle, in the order their checks
+# run; type checks come first so that later checks can assume matching types.
+_COMPILERS: list[
+    tuple[frozenset[str], Callable[[_Compiler, dict[str, Any]], Validator]]
+] = [
+    (frozenset({"$ref"}), _ref),
+    (frozenset({"type"}), _type),
+    (frozenset({"enum"}), _enum),
+    (frozenset({"const"}), _const),
+    (
+        frozenset(
+            {
+                *_BOUNDS,
+                "pattern",
+            },
+        ),
+        _bounds,
+    ),
+    (frozenset({"properties", "required", "additionalProperties"}), _object),
+    (frozenset({"items", "prefixItems"}), _array),
+    (frozenset({"anyOf"}), _any_of),
+    (frozenset({"oneOf"}), _one_of),
+    (frozenset({"allOf"}), _all_of),
+    (frozenset({"not"}), _not),
+]
+_KEYWORDS = frozenset().union(*(keywords for keywords, _ in _COMPILERS))
+
+# keyword: (valid value, expected value), checked before compiling a schema
+_SHAPES: dict[str, tuple[Callable[[Any], bool], str]] = {
+    "$ref": (_TYPES["string"], "a string"),
+    "type": (
+        lambda value: isinstance(value, str) or _is_string_list(value),
+        "a string or an array of strings",
+    ),
+    "enum": (_is_array, "an array"),
+    "properties": (_TYPES["object"], "an object"),
+    "required": (_is_string_list, "an array of strings"),
+    "additionalProperties": (_is_schema, "a schema"),
+    "items": (_is_schema, "a schema"),
+    "prefixItems": (_is_array, "an array of schemas"),
+    "anyOf": (_is_array, "an array of schemas"),
+    "oneOf": (_is_array, "an array of schemas"),
+    "allOf": (_is_array, "an array of schemas"),
+    "not": (_is_schema, "a schema"),
+    "pattern": (_TYPES["string"], "a string"),
+    "uniqueItems": (_TYPES["boolean"], "a boolean"),
+    "multipleOf": (
+        lambda value: _is_number(value) and value > 0,
+        "a number greater than 0",
+    ),
+    **dict.fromkeys(
+        (
+            "minLength",
+            "maxLength",
+            "minItems",
+            "maxItems",
+            "minProperties",
+            "maxProperties",
+        ),
+        (_is_count, "a non-negative integer"),
+    ),
+    **dict.fromkeys(
+        ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"),
+        (_is_number, "a number"),
+    ),
+}
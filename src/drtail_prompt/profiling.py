@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from types import FrameType
+from typing import Any, Callable
+
+from drtail_prompt import tracing
+
+# Phases in pipeline order; timings are inclusive of nested phases.
+PHASES = (
+    tracing.LOAD_PROMPT,
+    tracing.READ_FILE,
+    tracing.PARSE_YAML,
+    tracing.VALIDATE_SCHEMA,
+    tracing.IMPORT_MODEL,
+    tracing.VALIDATE_INPUT,
+    tracing.RENDER,
+)
+
+
+class PhaseTimer(tracing.Tracer):
+    """Tracer accumulating the call count and total seconds of each phase."""
+
+    def __init__(self) -> None:
+        self.calls: dict[str, int] = defaultdict(int)
+        self.seconds: dict[str, float] = defaultdict(float)
+
+    def on_start(self, name: str, attributes: dict[str, Any]) -> Any:
+        return time.perf_counter()
+
+    def on_end(
+        self,
+        token: Any,
+        name: str,
+        attributes: dict[str, Any],
+        error: BaseException | None,
+    ) -> None:
+        self.calls[name] += 1
+        self.seconds[name] += time.perf_counter() - token
+
+
+def profile_phases(fn: Callable[[], Any], iterations: int) -> PhaseTimer:
+    timer = PhaseTimer()
+    previous = tracing.get_tracer()
+    tracing.set_tracer(timer)
+    try:
+        for _ in range(iterations):
+            fn()
+    finally:
+        tracing.set_tracer(previous)
+    return timer
+
+
+def profile_cpu(fn: Callable[[], Any], iterations: int) -> cProfile.Profile:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        for _ in range(iterations):
+            fn()
+    finally:
+        profiler.disable()
+    return profiler
+
+
+def profile_memory(
+    fn: Callable[[], Any],
+    iterations: int,
+) -> tuple[tracemalloc.Snapshot, int]:
+    """
+    Returns a snapshot of the memory still held after `iterations` runs, whose
+    results are kept alive, and the peak traced memory in bytes.
+    """
+    results = []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            results.append(fn())
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return snapshot, peak
+
+
+def collapsed_stacks(fn: Callable[[], Any], iterations: int) -> dict[str, int]:
+    """
+    Runs `fn` under a deterministic stack profiler and returns the self time in
+    microseconds of every call stack, keyed by its `;`-joined frames (the
+    collapsed-stack format consumed by flamegraph tools).
+    """
+    stack: list[str] = []
+    totals: dict[tuple[str, ...], float] = defaultdict(float)
+    last = time.perf_counter()
+
+    def profiler(frame: FrameType, event: str, arg: Any) -> None:
+        nonlocal last
+        now = time.perf_counter()
+        if stack:
+            totals[tuple(stack)] += now - last
+        if event == "call":
+            module = frame.f_globals.get("__name__", "?")
+            stack.append(f"{module}.{frame.f_code.co_name}")
+        elif event == "c_call":
+            stack.append(getattr(arg, "__qualname__", repr(arg)))
+        elif stack:
+            stack.pop()
+        last = time.perf_counter()
+
+    sys.setprofile(profiler)
+    try:
+        for _ in range(iterations):
+            fn()
+    finally:
+        sys.setprofile(None)
+
+    collapsed = {
+        ";".join(frames): round(seconds * 1_000_000)
+        for frames, seconds in totals.items()
+    }
+    return {frames: us for frames, us in collapsed.items() if us > 0}
+
+
+def format_phases(timer: PhaseTimer, iterations: int) -> str:
+    total = timer.seconds.get(tracing.LOAD_PROMPT, 0.0)
+    lines = [
+        f"{'phase':<32} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'share':>7}",
+    ]
+    for phase in PHASES:
+        if phase not in timer.calls:
+            continue
+        seconds = timer.seconds[phase]
+        lines.append(
+            f"{phase:<32} {timer.calls[phase]:>7} {seconds * 1000:>10.3f} "
+            f"{seconds * 1000 / iterations:>9.3f} "
+            f"{seconds / total if total else 0:>7.1%}",
+        )
+    return "\n".join(lines)
+
+
+def format_cpu(profiler: cProfile.Profile, sort: str, limit: int) -> str:
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue().strip("\n")
+
+
+def format_memory(snapshot: tracemalloc.Snapshot, peak: int, limit: int) -> str:
+    lines = [f"peak traced memory: {peak / 1024:.1f} KiB"]
+    for statistic in snapshot.statistics("lineno")[:limit]:
+        frame = statistic.traceback[0]
+        lines.append(
+            f"{statistic.size / 1024:>10.1f} KiB {statistic.count:>8} blocks  "
+            f"{frame.filename}:{frame.lineno}",
+        )
+    return "\n".join(lines)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+from drtail_prompt.core import FrozenDict, Prompt, freeze
+from drtail_prompt.exception import PromptValidationError
+
+SYSTEM_ROLES = frozenset({"system", "developer"})
+
+
+class PayloadBuilder(ABC):
+    """
+    Builds provider request bodies for a prompt.
+
+    Everything that does not depend on the rendered message contents (model,
+    role mapping, metadata, structured output format) is precomputed once from
+    the prompt passed to the constructor. `build` then only splices in the
+    rendered contents of a prompt loaded from the same file.
+
+    Static parts of the returned body are shared, read-only views.
+    """
+
+    def __init__(self, prompt: Prompt, model: str, **options: Any) -> None:
+        self.roles: tuple[str, ...] = tuple(m.role for m in prompt.messages)
+        self.skeleton: FrozenDict = freeze(
+            {
+                **self._static_body(prompt, model),
+                **options,
+            },
+        )
+
+    @abstractmethod
+    def _static_body(self, prompt: Prompt, model: str) -> dict[str, Any]:
+        """Returns the parts of the body not depending on message contents."""
+
+    @abstractmethod
+    def _dynamic_body(self, contents: list[str]) -> dict[str, Any]:
+        """Returns the parts of the body built from the rendered contents."""
+
+    def build(self, prompt: Prompt) -> dict[str, Any]:
+        """Returns the request body for the rendered `prompt`."""
+        messages = prompt.messages
+        if tuple(m.role for m in messages) != self.roles:
+            raise PromptValidationError(
+                "Prompt messages do not match the roles the builder was created for",
+            )
+
+        body = dict(self.skeleton)
+        body.update(self._dynamic_body([m.content for m in messages]))
+        return body
+
+
+class OpenAIPayloadBuilder(PayloadBuilder):
+    """
+    OpenAI Responses API (`client.responses.create(**body)`).
+    See https://platform.openai.com/docs/api-reference/responses/create
+    """
+
+    def _static_body(self, prompt: Prompt, model: str) -> dict[str, Any]:
+        rendered = prompt.rendered
+        body: dict[str, Any] = {
+            "model": model,
+            "metadata": {k: v for k, v in rendered.metadata.items() if v is not None},
+        }
+        if rendered.structured_output_format:
+            body["text"] = rendered.structured_output_format
+        return body
+
+    def _dynamic_body(self, contents: list[str]) -> dict[str, Any]:
+        return {
+            "input": [
+                {"role": role, "content": content}
+                for role, content in zip(self.roles, contents)
+            ],
+        }
+
+
+class AnthropicPayloadBuilder(PayloadBuilder):
+    """
+    Anthropic Messages API (`client.messages.create(**body)`).
+    System and developer messages are joined into the top-level `system`
+    field. The structured output format is enforced by forcing a single tool
+    whose input schema is the output model.
+    See https://docs.anthropic.com/en/api/messages
+    """
+
+    def __init__(
+        self,
+        prompt: Prompt,
+        model: str,
+        max_tokens: int = 1024,
+        **options: Any,
+    ) -> None:
+        super().__init__(prompt, model, max_tokens=max_tokens, **options)
+
+    def _static_body(self, prompt: Prompt, model: str) -> dict[str, Any]:
+        body: dict[str, Any] = {"model": model}
+        output_format = prompt.rendered.structured_output_format
+        if output_format:
+            name = output_format["format"]["name"]
+            body["tools"] = [
+                {
+                    "name": name,
+                    "description": f"Respond with a {name} object.",
+                    "input_schema": output_format["format"]["schema"],
+                },
+            ]
+            body["tool_choice"] = {"type": "tool", "name": name}
+        return body
+
+    def _dynamic_body(self, contents: list[str]) -> dict[str, Any]:
+        system: list[str] = []
+        messages: list[dict[str, str]] = []
+        for role, content in zip(self.roles, contents):
+            if role in SYSTEM_ROLES:
+                system.append(content)
+            else:
+                messages.append({"role": role, "content": content})
+
+        body: dict[str, Any] = {"messages": messages}
+        if system:
+            body["system"] = "\n\n".join(system)
+        return body
+
+
+class GeminiPayloadBuilder(PayloadBuilder):
+    """
+    Gemini `generateContent` request body. The model is part of the endpoint
+    URL, not the body, and is kept on `self.model`. `assistant` messages are
+    mapped to the `model` role; system and developer messages go to
+    `systemInstruction`.
+    See https://ai.google.dev/api/generate-content
+    """
+
+    def __init__(self, prompt: Prompt, model: str, **options: Any) -> None:
+        self.model = model
+        super().__init__(prompt, model, **options)
+
+    def _static_body(self, prompt: Prompt, model: str) -> dict[str, Any]:
+        body: dict[str, Any] = {}
+        output_format = prompt.rendered.structured_output_format
+        if output_format:
+            body["generationConfig"] = {
+                "responseMimeType": "application/json",
+                "responseJsonSchema": output_format["format"]["schema"],
+            }
+        return body
+
+    def _dynamic_body(self, contents: list[str]) -> dict[str, Any]:
+        system: list[dict[str, str]] = []
+        messages: list[dict[str, Any]] = []
+        for role, content in zip(self.roles, contents):
+            if role in SYSTEM_ROLES:
+                system.append({"text": content})
+            else:
+                messages.append(
+                    {
+                        "role": "model" if role == "assistant" else "user",
+                        "parts": [{"text": content}],
+                    },
+                )
+
+        body: dict[str, Any] = {"contents": messages}
+        if system:
+            body["systemInstruction"] = {"parts": system}
+        return body
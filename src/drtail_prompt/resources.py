@@ -0,0 +1,67 @@
+"""
+Reads prompts packaged as `importlib.resources`, including packages imported
+from wheels and zip archives, without extracting them.
+
+A package's resource root is resolved once, so a zip-backed package reads
+its archive's central directory a single time. The recursive listing and the
+decoded text of each resource are cached too; packaged resources are
+expected not to change while the process runs. Call `clear_cache` if they do.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+from importlib.resources import files
+from typing import TYPE_CHECKING
+
+from drtail_prompt import stats
+
+if TYPE_CHECKING:
+    from importlib.abc import Traversable
+
+
+@cache
+def package_files(package: str) -> Traversable:
+    """Returns the resource root of `package`, shared by every lookup."""
+    return files(package)
+
+
+@cache
+def list_resources(package: str) -> dict[str, Traversable]:
+    """Returns every resource of `package` by its `/`-separated relative name."""
+    resources: dict[str, Traversable] = {}
+    pending: list[tuple[str, Traversable]] = [("", package_files(package))]
+    while pending:
+        prefix, directory = pending.pop()
+        for entry in directory.iterdir():
+            name = f"{prefix}{entry.name}"
+            if entry.is_dir():
+                if entry.name != "__pycache__":
+                    pending.append((f"{name}/", entry))
+            elif not name.endswith((".py", ".pyc")):
+                resources[name] = entry
+    return dict(sorted(resources.items()))
+
+
+@cache
+def read_resource(package: str, name: str) -> str:
+    """Returns the decoded text of resource `name` (e.g. `prompts/a.yaml`) of `package`."""
+    try:
+        resource = list_resources(package)[name]
+    except KeyError:
+        raise FileNotFoundError(
+            f"No resource '{name}' in package '{package}'",
+        ) from None
+    return resource.read_text(encoding="utf-8")
+
+
+def clear_cache() -> None:
+    read_resource.cache_clear()
+    list_resources.cache_clear()
+    package_files.cache_clear()
+
+
+stats.registry.register_cache(
+    "package_resources",
+    lambda: read_resource.cache_info()[:2],
+)
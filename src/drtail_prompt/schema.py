@@ -1,9 +1,14 @@
-from typing import Any, Optional
+import json
+import time
+from typing import Any, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 from typing_extensions import Self
 
-from .template import environment
+from . import guardrails, interning, stats, tracing
+from .budget import render_within_budget
+from .json_schema import Validator, compile_schema
+from .template import compile_template
 
 
 class Author(BaseModel):
@@ -19,12 +24,26 @@ class Metadata(BaseModel):
     model_config = ConfigDict(extra="allow")
 
 
+class SharedAuthor(Author):
+    """Read-only author shared by the loaded prompts with an identical one."""
+
+    model_config = ConfigDict(frozen=True)
+
+
+class SharedMetadata(Metadata):
+    """Read-only metadata shared by the loaded prompts with identical metadata."""
+
+    model_config = ConfigDict(frozen=True)
+
+
 class IOBase(BaseModel):
     type: str
     model: Optional[str] = Field(default=None)
     schema_: Optional[dict] = Field(default=None, alias="schema")
 
     instance: Optional[BaseModel] = Field(init=False, default=None)
+    # Compiled validator of an inline JSON schema
+    _validator: Optional[Validator] = PrivateAttr(default=None)
 
     def post_init(self, __context: Any) -> None:
         if not self.model or self.type != "pydantic":
@@ -45,21 +64,35 @@ class IOBase(BaseModel):
             raise ValueError("Instance is not set")
         return self.instance.model_validate(data)
 
+    def validate_data(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Validates `data` against the model or the inline JSON schema."""
+        if self._validator is not None:
+            self._validator(data)
+            return data
+        return self.instance_validate(data).model_dump()
+
     @model_validator(mode="after")
     def validate_instance(self) -> Self:
         if not self.model and not self.schema_:
             raise ValueError("Model or schema is not set")
 
+        if self.type == "jsonschema":
+            if not self.schema_:
+                raise ValueError("Schema is not set")
+            self._validator = compile_schema(self.schema_)
+            return self
+
         if not self.type == "pydantic":
-            raise NotImplementedError("Only pydantic is supported for now")
+            raise NotImplementedError("Only pydantic and jsonschema are supported")
 
         if not self.model:
-            raise NotImplementedError("Schema is not supported for now")
+            raise NotImplementedError("Inline schema requires type jsonschema")
 
         module_path, class_name = self.model.rsplit(".", 1)
 
-        module = __import__(module_path, fromlist=[class_name])
-        input_model_pydantic: BaseModel = getattr(module, class_name)
+        with tracing.span(tracing.IMPORT_MODEL, model=self.model):
+            module = __import__(module_path, fromlist=[class_name])
+            input_model_pydantic: BaseModel = getattr(module, class_name)
 
         if self.instance is None:
             self.set_instance(input_model_pydantic)
@@ -73,6 +106,58 @@ class Input(IOBase): ...
 class Output(IOBase): ...
 
 
+class TruncatableField(BaseModel):
+    field: str = Field(description="Dotted path of a string or list input field.")
+    priority: int = Field(
+        default=0,
+        description="Fields with a lower priority are truncated first.",
+    )
+    keep: Literal["head", "tail"] = Field(
+        default="head",
+        description="Which end of the value is kept when truncating.",
+    )
+    marker: str = Field(
+        default="",
+        description="Appended to (or prepended to, keeping the tail) truncated strings.",
+    )
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class Budget(BaseModel):
+    max_size: int = Field(gt=0, description="Maximum size of all rendered messages.")
+    unit: str = Field(
+        default="chars",
+        description="Size unit: chars, bytes or a registered token counter.",
+    )
+    truncate: list[TruncatableField] = Field(
+        default_factory=list,
+        description="Input fields that may be truncated to fit the budget.",
+    )
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class RenderLimits(BaseModel):
+    max_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Maximum wall time of the whole render, in seconds.",
+    )
+    max_output_bytes: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Maximum size of each rendered message, in UTF-8 bytes.",
+    )
+    max_loop_iterations: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Maximum number of loop iterations rendering each message.",
+    )
+
+    model_config = ConfigDict(extra="forbid")
+
+
 class Message(BaseModel):
     role: str
     content: str
@@ -128,6 +213,14 @@ class BasicPromptSchema(BaseModel):
         description="Output of the prompt. If the prompt does not require output, set it to None.",
     )
     messages: list[Message] = Field(description="Messages of the prompt.")
+    budget: Optional[Budget] = Field(
+        default=None,
+        description="Maximum rendered size of the prompt, enforced by truncating inputs.",
+    )
+    limits: Optional[RenderLimits] = Field(
+        default=None,
+        description="Limits of each render, tightening the process-wide defaults.",
+    )
 
     model_config = ConfigDict(
         extra="forbid",
@@ -136,11 +229,65 @@ class BasicPromptSchema(BaseModel):
     )
 
     def interpolate(self, data: dict[str, Any]) -> "BasicPromptSchema":
-        for message in self.messages:
-            template = environment.from_string(message.content)
-            message.content = template.render(**data)
+        with tracing.span(
+            tracing.RENDER,
+            prompt_name=self.name,
+            prompt_version=self.version,
+            message_count=len(self.messages),
+        ) as render_span:
+            start = time.perf_counter()
+            limits = self.limits.model_dump() if self.limits is not None else {}
+            with guardrails.limit_render(**limits):
+                if self.budget is None:
+                    for message in self.messages:
+                        template = compile_template(message.content)
+                        message.content = guardrails.render(template, data)
+                else:
+                    contents = render_within_budget(
+                        self.budget,
+                        [message.content for message in self.messages],
+                        data,
+                    )
+                    for message, content in zip(self.messages, contents):
+                        message.content = content
+            elapsed = time.perf_counter() - start
+            rendered_bytes = sum(
+                stats.utf8_size(message.content) for message in self.messages
+            )
+            render_span.set_attribute("rendered_bytes", rendered_bytes)
+        stats.registry.record_render(self.name, self.version, elapsed, rendered_bytes)
         return self
 
+    def intern_values(self) -> None:
+        """
+        Shares strings and records identical to those of other loaded prompts,
+        e.g. other versions of this prompt. Shared authors and metadata are
+        frozen copies, so changing one raises instead of changing every prompt
+        sharing it.
+        """
+        pool = interning.pool
+        if not pool.enabled:
+            return
+        self.name = pool.string(self.name)
+        self.description = pool.string(self.description)
+        self.authors = [
+            pool.record(
+                "authors",
+                (author.name, author.email),
+                SharedAuthor(**author.model_dump()),
+            )
+            for author in self.authors
+        ]
+        metadata = self.metadata.model_dump()
+        self.metadata = pool.record(
+            "metadata",
+            json.dumps(metadata, sort_keys=True, default=str),
+            SharedMetadata(**metadata),
+        )
+        for message in self.messages:
+            message.role = pool.string(message.role)
+            message.content = pool.string(message.content)
+
     @model_validator(mode="before")
     def validate_version(cls, data: dict[str, Any]) -> dict[str, Any]:
         version = data.get("version")
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from collections.abc import Sequence
+from typing import Any, Callable
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def utf8_size(text: str) -> int:
+    """Size of `text` encoded in UTF-8, without encoding ASCII text."""
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class Histogram:
+    """Fixed-bucket histogram; `counts[-1]` holds observations above the last bound."""
+
+    __slots__ = ("bounds", "count", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: Histogram) -> None:
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> float:
+        """Estimates the `q` quantile by interpolating within the matching bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class PromptStats:
+    """Counters for one prompt name and version."""
+
+    __slots__ = (
+        "loads",
+        "lock",
+        "render_latency",
+        "rendered_bytes",
+        "renders",
+        "validation_failures",
+    )
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.loads = 0
+        self.renders = 0
+        self.validation_failures = 0
+        self.render_latency = Histogram(LATENCY_BUCKETS)
+        self.rendered_bytes = Histogram(SIZE_BUCKETS)
+
+    def merge(self, other: PromptStats) -> None:
+        with self.lock:
+            self.loads += other.loads
+            self.renders += other.renders
+            self.validation_failures += other.validation_failures
+            self.render_latency.merge(other.render_latency)
+            self.rendered_bytes.merge(other.rendered_bytes)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__ if name != "lock"}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.lock = threading.Lock()
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class StatsRegistry:
+    """
+    Always-on aggregate statistics per prompt name and version.
+
+    The registry-wide lock is only taken the first time a prompt is seen; hot
+    path updates take the lock of their own prompt only.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._prompts: dict[tuple[str, str], PromptStats] = {}
+        self._cache_hits: dict[str, int] = {}
+        self._cache_misses: dict[str, int] = {}
+        self._cache_sources: dict[str, Callable[[], tuple[int, int]]] = {}
+        self.enabled = True
+
+    def _entry(self, name: str, version: str) -> PromptStats:
+        key = (name, version)
+        entry = self._prompts.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._prompts.setdefault(key, PromptStats())
+        return entry
+
+    def record_load(self, name: str, version: str) -> None:
+        if not self.enabled:
+            return
+        entry = self._entry(name, version)
+        with entry.lock:
+            entry.loads += 1
+
+    def record_render(
+        self,
+        name: str,
+        version: str,
+        seconds: float,
+        rendered_bytes: int,
+    ) -> None:
+        if not self.enabled:
+            return
+        entry = self._entry(name, version)
+        with entry.lock:
+            entry.renders += 1
+            entry.render_latency.observe(seconds)
+            entry.rendered_bytes.observe(rendered_bytes)
+
+    def record_validation_failure(self, name: str, version: str) -> None:
+        if not self.enabled:
+            return
+        entry = self._entry(name, version)
+        with entry.lock:
+            entry.validation_failures += 1
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        if not self.enabled:
+            return
+        counters = self._cache_hits if hit else self._cache_misses
+        with self._lock:
+            counters[cache] = counters.get(cache, 0) + 1
+
+    def register_cache(self, cache: str, source: Callable[[], tuple[int, int]]) -> None:
+        """Registers a cache whose `(hits, misses)` are read at snapshot time."""
+        with self._lock:
+            self._cache_sources[cache] = source
+
+    def _caches(self) -> dict[str, tuple[int, int]]:
+        with self._lock:
+            cache_hits = dict(self._cache_hits)
+            cache_misses = dict(self._cache_misses)
+            sources = list(self._cache_sources.items())
+        caches = {
+            cache: (cache_hits.get(cache, 0), cache_misses.get(cache, 0))
+            for cache in {*cache_hits, *cache_misses}
+        }
+        for cache, source in sources:
+            hits, misses = source()
+            previous_hits, previous_misses = caches.get(cache, (0, 0))
+            caches[cache] = (previous_hits + hits, previous_misses + misses)
+        return caches
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns a point-in-time copy of every statistic as plain data."""
+        with self._lock:
+            entries = sorted(self._prompts.items())
+        prompts = []
+        for (name, version), entry in entries:
+            with entry.lock:
+                prompts.append(
+                    {
+                        "name": name,
+                        "version": version,
+                        "loads": entry.loads,
+                        "renders": entry.renders,
+                        "validation_failures": entry.validation_failures,
+                        "render_latency_seconds": entry.render_latency.snapshot(),
+                        "rendered_bytes": entry.rendered_bytes.snapshot(),
+                    },
+                )
+        caches = {
+            cache: {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            }
+            for cache, (hits, misses) in sorted(self._caches().items())
+        }
+        return {"prompts": prompts, "caches": caches}
+
+    def drain(self) -> StatsRegistry:
+        """
+        Moves the recorded statistics into a new registry and resets this one.
+        Registered cache sources stay here.
+        """
+        drained = StatsRegistry()
+        with self._lock:
+            drained._prompts, self._prompts = self._prompts, {}
+            drained._cache_hits, self._cache_hits = self._cache_hits, {}
+            drained._cache_misses, self._cache_misses = self._cache_misses, {}
+        return drained
+
+    def merge(self, other: StatsRegistry) -> None:
+        """Adds the statistics of `other`, e.g. drained from a worker process."""
+        for (name, version), entry in other._prompts.items():
+            self._entry(name, version).merge(entry)
+        with self._lock:
+            for cache, hits in other._cache_hits.items():
+                self._cache_hits[cache] = self._cache_hits.get(cache, 0) + hits
+            for cache, misses in other._cache_misses.items():
+                self._cache_misses[cache] = self._cache_misses.get(cache, 0) + misses
+
+    def reset(self) -> None:
+        self.drain()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {
+            "prompts": self._prompts,
+            "cache_hits": self._cache_hits,
+            "cache_misses": self._cache_misses,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__()  # type: ignore[misc]
+        self._prompts = state["prompts"]
+        self._cache_hits = state["cache_hits"]
+        self._cache_misses = state["cache_misses"]
+
+    def to_prometheus(self, namespace: str = "drtail_prompt") -> str:
+        """Renders every statistic in the Prometheus text exposition format."""
+        lines: list[str] = []
+
+        def header(metric: str, kind: str, description: str) -> None:
+            lines.append(f"# HELP {namespace}_{metric} {description}")
+            lines.append(f"# TYPE {namespace}_{metric} {kind}")
+
+        with self._lock:
+            prompts = sorted(self._prompts.items())
+
+        for metric, attribute, description in (
+            ("loads_total", "loads", "Number of prompt loads."),
+            ("renders_total", "renders", "Number of prompt renders."),
+            (
+                "validation_failures_total",
+                "validation_failures",
+                "Number of prompt input validation failures.",
+            ),
+        ):
+            header(metric, "counter", description)
+            for (name, version), entry in prompts:
+                labels = _labels(prompt=name, version=version)
+                lines.append(
+                    f"{namespace}_{metric}{{{labels}}} {getattr(entry, attribute)}",
+                )
+
+        for metric, attribute, description in (
+            (
+                "render_duration_seconds",
+                "render_latency",
+                "Prompt render latency in seconds.",
+            ),
+            ("rendered_bytes", "rendered_bytes", "Size of rendered prompts in bytes."),
+        ):
+            header(metric, "histogram", description)
+            for (name, version), entry in prompts:
+                with entry.lock:
+                    histogram: Histogram = getattr(entry, attribute)
+                    lines.extend(
+                        _histogram_lines(
+                            f"{namespace}_{metric}",
+                            _labels(prompt=name, version=version),
+                            histogram,
+                        ),
+                    )
+
+        caches = sorted(self._caches().items())
+        header("cache_hits_total", "counter", "Number of cache hits.")
+        for cache, (hits, _) in caches:
+            lines.append(
+                f"{namespace}_cache_hits_total{{{_labels(cache=cache)}}} {hits}",
+            )
+        header("cache_misses_total", "counter", "Number of cache misses.")
+        for cache, (_, misses) in caches:
+            lines.append(
+                f"{namespace}_cache_misses_total{{{_labels(cache=cache)}}} {misses}",
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _number(value: float) -> str:
+    # Shortest exact representation, e.g. 1048576.0 (`:g` rounds to 1.04858e+06)
+    return repr(float(value))
+
+
+def _histogram_lines(metric: str, labels: str, histogram: Histogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{labels},le="{_number(bound)}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{metric}_sum{{{labels}}} {_number(histogram.sum)}")
+    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+registry = StatsRegistry()
@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import json
+import re
+import types
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from functools import cache
+from typing import (
+    Annotated,
+    Any,
+    NamedTuple,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from drtail_prompt import stats
+from drtail_prompt.exception import PromptValidationError
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = frozenset(" \t\n\r")
+# `X | Y` annotations have their own origin from Python 3.10
+_UNION_ORIGINS = frozenset(
+    origin for origin in (Union, getattr(types, "UnionType", None)) if origin
+)
+
+
+class StreamEvent(NamedTuple):
+    """
+    A completed piece of the structured output.
+
+    `path` is `(field,)` for a top-level field, `(field, index)` for an item of
+    a list field and `()` for the final, fully validated output model.
+    """
+
+    path: tuple[str | int, ...]
+    value: Any
+
+
+class _FieldValidator(NamedTuple):
+    adapter: TypeAdapter[Any]
+    item_adapter: TypeAdapter[Any] | None
+
+
+class _Pending(NamedTuple):
+    start: int
+    kind: str  # "string", "container" or "literal"
+
+
+def _list_item_type(annotation: Any) -> Any:
+    if get_origin(annotation) in _UNION_ORIGINS:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            return None
+        annotation = args[0]
+    if get_origin(annotation) is list:
+        (item_type,) = get_args(annotation) or (Any,)
+        return item_type
+    return None
+
+
+@cache
+def _field_validators(model: type[BaseModel]) -> dict[str, _FieldValidator]:
+    validators: dict[str, _FieldValidator] = {}
+    for name, field in model.model_fields.items():
+        key = field.validation_alias or field.alias or name
+        if not isinstance(key, str):
+            continue
+        annotation = (
+            Annotated[(field.annotation, *field.metadata)]
+            if field.metadata
+            else field.annotation
+        )
+        item_type = _list_item_type(field.annotation)
+        validators[key] = _FieldValidator(
+            adapter=TypeAdapter(annotation),
+            item_adapter=TypeAdapter(item_type) if item_type is not None else None,
+        )
+    return validators
+
+
+stats.registry.register_cache(
+    "stream_field_validators",
+    lambda: _field_validators.cache_info()[:2],
+)
+
+
+class StreamingOutputParser:
+    """
+    Incremental parser for a JSON object streamed in text chunks.
+
+    Each top-level field is validated against the output model as soon as its
+    value is complete, and each item of a list field as soon as the item is
+    complete, so that invalid generations fail before the stream ends. Only the
+    unfinished tail of the stream is buffered.
+    """
+
+    def __init__(self, output_model: type[BaseModel]) -> None:
+        self.output_model = output_model
+        self._validators = _field_validators(output_model)
+        self._strict = output_model.model_config.get("strict")
+        self._forbid_extra = output_model.model_config.get("extra") == "forbid"
+
+        self._buffer = ""
+        self._base = 0  # stream offset of self._buffer[0]
+        self._pos = 0  # stream offset of the next character to scan
+        self._stack: list[str] = []
+        self._in_string = False
+        self._finished = False
+        self._previous = ""  # last character scanned outside of strings
+
+        self._expect_key = False
+        self._expect_colon = False
+        self._key_start: int | None = None
+        self._key: str | None = None
+        self._awaiting_value = False
+        self._value: _Pending | None = None
+        self._awaiting_item = False
+        self._item: _Pending | None = None
+        self._items: list[Any] = []
+        self._streaming_items = False
+
+        self._values: dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> list[StreamEvent]:
+        """Consumes a chunk and returns the events it completed."""
+        events: list[StreamEvent] = []
+        buf = self._buffer + chunk
+        base = self._base
+        i = self._pos - base
+        n = len(buf)
+
+        while i < n:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buf, i)
+                if match is None:
+                    i = n
+                    break
+                i = match.start()
+                if buf[i] == "\\":
+                    if i + 1 >= n:
+                        break  # wait for the escaped character
+                    i += 2
+                    continue
+                self._in_string = False
+                self._on_string_end(buf, base, i + 1, events)
+            elif buf[i] not in _WHITESPACE:
+                self._on_char(buf, base, i, events)
+            i += 1
+
+        self._pos = base + i
+        keep = min(
+            start
+            for start in (
+                self._pos,
+                self._key_start,
+                self._value.start
+                if self._value and not self._streaming_items
+                else None,
+                self._item.start if self._item else None,
+            )
+            if start is not None
+        )
+        self._buffer = buf[keep - base :]
+        self._base = keep
+        return events
+
+    def close(self) -> BaseModel:
+        """Validates the complete output once the stream has ended."""
+        if not self._finished:
+            raise PromptValidationError("Output stream ended before the JSON object")
+        try:
+            return self.output_model.model_validate(self._values)
+        except ValidationError as e:
+            raise PromptValidationError(e) from e
+
+    def _on_char(self, buf: str, base: int, i: int, events: list[StreamEvent]) -> None:
+        c = buf[i]
+        depth = len(self._stack)
+
+        if self._finished:
+            raise PromptValidationError("Unexpected data after the JSON object")
+        if c in "}]" and self._previous == ",":
+            raise PromptValidationError(f"Unexpected '{c}' in output")
+        self._previous = c
+        if depth == 0:
+            if c != "{":
+                raise PromptValidationError("Output should be a JSON object")
+            self._stack.append(c)
+            self._expect_key = True
+            return
+
+        self._check_top_level(c, depth)
+        self._check_list_item(c, depth)
+        self._start_pending(c, depth, base + i)
+
+        if c == '"':
+            self._in_string = True
+            if depth == 1 and self._expect_key:
+                self._key_start = base + i
+        elif c in "{[":
+            self._open_container(c, depth, base + i)
+        elif c in ",}]":
+            self._on_delimiter(buf, base, i, events)
+        elif c == ":" and depth == 1:
+            self._expect_colon = False
+            self._awaiting_value = True
+
+    def _check_top_level(self, c: str, depth: int) -> None:
+        if depth != 1 or self._awaiting_value:
+            return
+        if self._expect_key:
+            unexpected = c not in '"}'
+        elif self._expect_colon:
+            unexpected = c != ":"
+        elif self._value is not None:  # an unfinished literal
+            unexpected = c in '"{[:'
+        else:  # a complete value
+            unexpected = c not in ",}"
+        if unexpected:
+            raise PromptValidationError(f"Unexpected '{c}' in output")
+
+    def _check_list_item(self, c: str, depth: int) -> None:
+        if depth != 2 or not self._streaming_items or self._awaiting_item:
+            return
+        if self._item is not None:  # an unfinished literal
+            unexpected = c in '"{[:'
+        else:  # a complete item
+            unexpected = c not in ",]"
+        if unexpected:
+            raise PromptValidationError(f"Unexpected '{c}' in output")
+
+    def _start_pending(self, c: str, depth: int, offset: int) -> None:
+        kind = "string" if c == '"' else "container" if c in "{[" else "literal"
+        if depth == 1 and self._awaiting_value:
+            self._awaiting_value = False
+            self._value = _Pending(offset, kind)
+        elif depth == 2 and self._awaiting_item and c != "]":
+            self._awaiting_item = False
+            self._item = _Pending(offset, kind)
+
+    def _open_container(self, c: str, depth: int, offset: int) -> None:
+        self._stack.append(c)
+        if c != "[" or depth != 1 or self._value is None or self._key is None:
+            return
+        validator = self._validators.get(self._key)
+        if self._value.start == offset and validator and validator.item_adapter:
+            self._streaming_items = True
+            self._awaiting_item = True
+
+    def _on_delimiter(
+        self,
+        buf: str,
+        base: int,
+        i: int,
+        events: list[StreamEvent],
+    ) -> None:
+        c = buf[i]
+        depth = len(self._stack)
+        # Literals (numbers, true, false, null) only end at the next delimiter.
+        if depth == 2 and self._item is not None and self._item.kind == "literal":
+            self._complete_item(buf, base, i, events)
+        if depth == 1 and self._value is not None and self._value.kind == "literal":
+            self._complete_value(buf, base, i, events)
+
+        if c == ",":
+            if depth == 1:
+                self._expect_key = True
+            elif depth == 2 and self._streaming_items:
+                self._awaiting_item = True
+            return
+
+        opener = self._stack.pop()
+        if (opener == "{") != (c == "}"):
+            raise PromptValidationError(f"Unexpected '{c}' in output")
+        depth -= 1
+        if depth == 0:
+            self._finished = True
+        elif depth == 2 and self._item is not None:
+            self._complete_item(buf, base, i + 1, events)
+        elif depth == 1 and self._value is not None:
+            # An empty streamed list closes while still awaiting its first item
+            self._awaiting_item = False
+            self._item = None
+            self._complete_value(buf, base, i + 1, events)
+
+    def _on_string_end(
+        self,
+        buf: str,
+        base: int,
+        end: int,
+        events: list[StreamEvent],
+    ) -> None:
+        depth = len(self._stack)
+        if depth == 1 and self._key_start is not None:
+            try:
+                self._key = json.loads(buf[self._key_start - base : end])
+            except json.JSONDecodeError as e:
+                raise PromptValidationError(e) from e
+            self._key_start = None
+            self._expect_key = False
+            self._expect_colon = True
+            if self._forbid_extra and self._key not in self._validators:
+                raise PromptValidationError(
+                    f"Unexpected field '{self._key}' in output",
+                )
+        elif depth == 2 and self._item is not None and self._item.kind == "string":
+            self._complete_item(buf, base, end, events)
+        elif depth == 1 and self._value is not None and self._value.kind == "string":
+            self._complete_value(buf, base, end, events)
+
+    def _complete_value(
+        self,
+        buf: str,
+        base: int,
+        end: int,
+        events: list[StreamEvent],
+    ) -> None:
+        assert self._value is not None and self._key is not None
+        key = self._key
+        validator = self._validators.get(key)
+
+        if self._streaming_items:
+            value: Any = self._items
+            self._items = []
+            self._streaming_items = False
+        else:
+            text = buf[self._value.start - base : end]
+            try:
+                if validator is None:
+                    value = json.loads(text)
+                else:
+                    value = validator.adapter.validate_json(text, strict=self._strict)
+            except (json.JSONDecodeError, ValidationError) as e:
+                raise PromptValidationError(f"Invalid output field '{key}': {e}") from e
+
+        self._value = None
+        self._values[key] = value
+        if validator is not None:
+            events.append(StreamEvent((key,), value))
+
+    def _complete_item(
+        self,
+        buf: str,
+        base: int,
+        end: int,
+        events: list[StreamEvent],
+    ) -> None:
+        assert self._item is not None and self._key is not None
+        item_adapter = self._validators[self._key].item_adapter
+        assert item_adapter is not None
+
+        text = buf[self._item.start - base : end]
+        try:
+            item = item_adapter.validate_json(text, strict=self._strict)
+        except ValidationError as e:
+            raise PromptValidationError(
+                f"Invalid item {len(self._items)} of output field '{self._key}': {e}",
+            ) from e
+
+        self._item = None
+        events.append(StreamEvent((self._key, len(self._items)), item))
+        self._items.append(item)
+
+
+def parse_stream(
+    output_model: type[BaseModel],
+    chunks: Iterable[str],
+) -> Iterator[StreamEvent]:
+    parser = StreamingOutputParser(output_model)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield StreamEvent((), parser.close())
+
+
+async def aparse_stream(
+    output_model: type[BaseModel],
+    chunks: AsyncIterable[str],
+) -> AsyncIterator[StreamEvent]:
+    parser = StreamingOutputParser(output_model)
+    async for chunk in chunks:
+        for event in parser.feed(chunk):
+            yield event
+    yield StreamEvent((), parser.close())
@@ -1,11 +1,26 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+from functools import lru_cache
 from typing import Any
 
+from jinja2 import BytecodeCache, FileSystemBytecodeCache, FileSystemLoader, Template
+from jinja2.bccache import Bucket
 from jinja2.environment import Environment
 from yaml import dump
 
+from drtail_prompt import guardrails, stats
+
+TEMPLATE_PATH_ENV = "DRTAIL_PROMPT_TEMPLATE_PATH"
+BYTECODE_CACHE_DIR_ENV = "DRTAIL_PROMPT_BYTECODE_CACHE_DIR"
+# Number of compiled message templates kept in memory
+TEMPLATE_CACHE_SIZE = 4096
+# Bytecode compiled with loop guards must not be mixed with plain Jinja
+# bytecode, nor with bytecode of another version of the guards
+BYTECODE_CACHE_PATTERN = f"__drtail_prompt_v{guardrails.CODE_VERSION}_%s.cache"
+
 
 def _remove_none(d: dict[str, Any]) -> dict[str, Any]:
     result: dict[str, dict[str, Any] | list[dict[str, Any]] | Any] = {}
@@ -56,5 +71,146 @@ def yaml(value: str | dict[str, Any], exclude_none: bool = True) -> str:
         return json.dumps(data)
 
 
-environment = Environment(trim_blocks=True, lstrip_blocks=True)
+def _default_search_path() -> list[str]:
+    value = os.environ.get(TEMPLATE_PATH_ENV)
+    if not value:
+        return []
+    return [path for path in value.split(os.pathsep) if path]
+
+
+class GuardedEnvironment(Environment):
+    """Compiles templates with their loops guarded, see `guardrails`."""
+
+    code_generator_class = guardrails.GuardedCodeGenerator
+    guard_iter = staticmethod(guardrails.guard_iter)
+
+
+class SafeBytecodeCache(FileSystemBytecodeCache):
+    """
+    Bytecode cache that never fails a render: an unreadable entry is a miss,
+    and a write to a missing or read-only directory is skipped.
+    """
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        try:
+            super().load_bytecode(bucket)
+        except OSError:
+            bucket.reset()
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+loader = FileSystemLoader(_default_search_path())
+# Created on first compile, see `get_bytecode_cache`
+bytecode_cache: FileSystemBytecodeCache | None = None
+_bytecode_cache_pending = True
+
+environment = GuardedEnvironment(
+    trim_blocks=True,
+    lstrip_blocks=True,
+    loader=loader,
+)
 environment.filters["yaml"] = yaml
+
+
+def get_bytecode_cache() -> BytecodeCache | None:
+    """
+    Returns the bytecode cache, creating the default one on first use rather
+    than at import, as Jinja creates its temporary directory eagerly. Without
+    a usable directory, compilation goes on without a cache.
+    """
+    global bytecode_cache, _bytecode_cache_pending
+    if _bytecode_cache_pending:
+        _bytecode_cache_pending = False
+        try:
+            bytecode_cache = SafeBytecodeCache(
+                os.environ.get(BYTECODE_CACHE_DIR_ENV),
+                BYTECODE_CACHE_PATTERN,
+            )
+        except (OSError, RuntimeError):
+            bytecode_cache = None
+        environment.bytecode_cache = bytecode_cache
+    return environment.bytecode_cache
+
+
+def set_template_search_path(*paths: str | os.PathLike[str]) -> None:
+    """
+    Set the directories searched for shared fragments used by
+    `{% include %}` / `{% import %}` in prompt messages.
+
+    Defaults to the `DRTAIL_PROMPT_TEMPLATE_PATH` environment variable
+    (`os.pathsep` separated).
+    """
+    loader.searchpath = [os.fspath(path) for path in paths]
+    # Templates resolved against the previous search path are stale now.
+    if environment.cache is not None:
+        environment.cache.clear()
+    compile_template.cache_clear()
+
+
+def set_bytecode_cache_dir(directory: str | os.PathLike[str] | None) -> None:
+    """
+    Set the directory backing the on-disk bytecode cache, or disable the cache
+    with `None`. Defaults to `DRTAIL_PROMPT_BYTECODE_CACHE_DIR`, falling back to
+    Jinja's per-user temporary directory.
+    """
+    global bytecode_cache, _bytecode_cache_pending
+    compile_template.cache_clear()
+    _bytecode_cache_pending = False
+    if directory is None:
+        bytecode_cache = environment.bytecode_cache = None
+        return
+    bytecode_cache = SafeBytecodeCache(
+        os.fspath(directory),
+        BYTECODE_CACHE_PATTERN,
+    )
+    environment.bytecode_cache = bytecode_cache
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(source: str) -> Template:
+    """
+    Compile a message template, going through the bytecode cache so that
+    compilation survives process restarts. Mirrors `BaseLoader.load` for
+    in-memory sources, which `Environment.from_string` never caches.
+
+    Compiled templates are kept in memory by source, shared by every prompt
+    (and prompt version) with an identical message.
+    """
+    bcc = get_bytecode_cache()
+    if bcc is None:
+        return environment.from_string(source)
+
+    digest = hashlib.sha1(source.encode("utf-8"), usedforsecurity=False).hexdigest()
+    name = f"<message:{digest}>"
+    try:
+        bucket = bcc.get_bucket(environment, name, None, source)
+    except (OSError, RuntimeError):
+        # A broken cache must not break rendering
+        return environment.from_string(source)
+    code = bucket.code
+    stats.registry.record_cache("template_bytecode", hit=code is not None)
+    if code is None:
+        code = environment.compile(source, name)
+        bucket.code = code
+        try:
+            bcc.set_bucket(bucket)
+        except (OSError, RuntimeError):
+            pass
+
+    return environment.template_class.from_code(
+        environment,
+        code,
+        environment.make_globals(None),
+        None,
+    )
+
+
+stats.registry.register_cache(
+    "templates",
+    lambda: compile_template.cache_info()[:2],
+)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from types import TracebackType
+from typing import Any
+
+# Span names emitted by the prompt pipeline
+LOAD_PROMPT = "drtail_prompt.load_prompt"
+READ_FILE = "drtail_prompt.read_file"
+PARSE_YAML = "drtail_prompt.parse_yaml"
+VALIDATE_SCHEMA = "drtail_prompt.validate_schema"
+IMPORT_MODEL = "drtail_prompt.import_model"
+VALIDATE_INPUT = "drtail_prompt.validate_input"
+RENDER = "drtail_prompt.render"
+
+
+class Tracer:
+    """
+    Receives start/end callbacks for each phase of the prompt pipeline.
+
+    `on_start` returns an opaque token that is handed back to `on_end` together
+    with the attributes collected during the span and the exception that ended
+    it, if any. The base class does nothing; subclass it and install it with
+    `set_tracer`.
+    """
+
+    def on_start(self, name: str, attributes: dict[str, Any]) -> Any:
+        return None
+
+    def on_end(
+        self,
+        token: Any,
+        name: str,
+        attributes: dict[str, Any],
+        error: BaseException | None,
+    ) -> None:
+        pass
+
+
+class Span:
+    __slots__ = ("attributes", "name", "token", "tracer")
+
+    def __init__(self, tracer: Tracer, name: str, attributes: dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.token: Any = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> Span:
+        self.token = self.tracer.on_start(self.name, dict(self.attributes))
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.tracer.on_end(self.token, self.name, self.attributes, exc)
+
+
+class _NoopSpan:
+    """Shared span used while no tracer is installed."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_tracer: Tracer | None = None
+
+
+def set_tracer(tracer: Tracer | None) -> None:
+    """Installs `tracer` for the whole process, or removes it with `None`."""
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, **attributes: Any) -> Span | _NoopSpan:
+    """Returns a context manager tracing `name`; a shared no-op without a tracer."""
+    if _tracer is None:
+        return _NOOP_SPAN
+    return Span(_tracer, name, attributes)
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Emits pipeline phases as OpenTelemetry spans, nested under the current
+    span. Requires the `opentelemetry-api` package.
+    """
+
+    def __init__(self, tracer: Any = None) -> None:
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer("drtail_prompt")
+
+    def on_start(self, name: str, attributes: dict[str, Any]) -> Any:
+        otel_span = self._tracer.start_span(name, attributes=attributes)
+        scope = self._trace.use_span(otel_span, end_on_exit=False)
+        scope.__enter__()
+        return otel_span, scope
+
+    def on_end(
+        self,
+        token: Any,
+        name: str,
+        attributes: dict[str, Any],
+        error: BaseException | None,
+    ) -> None:
+        otel_span, scope = token
+        otel_span.set_attributes(attributes)
+        if error is not None:
+            otel_span.record_exception(error)
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        scope.__exit__(None, None, None)
+        otel_span.end()
@@ -0,0 +1,56 @@
+import json
+
+from click.testing import CliRunner
+
+from benchmarks.suite import PHASES, compare, main, run_suite
+
+
+def test_run_suite_reports_every_phase():
+    results = run_suite(
+        messages=[2],
+        complexities=["nested"],
+        input_sizes=[3],
+        iterations=2,
+        warmup=0,
+    )
+
+    case = "messages=2,complexity=nested,input_size=3"
+    assert set(results["results"]) == {f"{case}/{phase}" for phase in PHASES}
+    for result in results["results"].values():
+        assert result["ops_per_sec"] > 0
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["peak_memory_kib"] > 0
+
+
+def test_compare_flags_regressions_past_threshold():
+    baseline = {"results": {"case/render": {"p50_ms": 1.0, "peak_memory_kib": 100}}}
+    results = {"results": {"case/render": {"p50_ms": 1.1, "peak_memory_kib": 200}}}
+
+    assert compare(results, baseline, threshold=0.2) == [
+        "case/render peak_memory_kib: 100.000 -> 200.000 (+100.0%)",
+    ]
+    assert compare(results, baseline, threshold=1.5) == []
+
+
+def test_main_fails_on_regression(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = [
+        "--messages=1",
+        "--complexity=simple",
+        "--input-size=1",
+        "--phase=schema",
+        "--iterations=2",
+    ]
+    runner = CliRunner()
+
+    result = runner.invoke(main, [*args, "--save", str(baseline)])
+    assert result.exit_code == 0, result.output
+
+    data = json.loads(baseline.read_text())
+    for metric in data["results"].values():
+        metric["p50_ms"] = metric["peak_memory_kib"] = 1e-9
+    baseline.write_text(json.dumps(data))
+
+    result = runner.invoke(main, [*args, "--baseline", str(baseline)])
+    assert result.exit_code == 1
+    assert "Regressions past 20%" in result.output
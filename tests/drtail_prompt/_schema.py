@@ -68,3 +68,15 @@ class Level2Field(BaseModel):
 class AdvancedPromptOutput(BaseModel):
     content: str
     level1: Level2Field
+
+
+class CapitalItem(BaseModel):
+    location: str
+    capital: str
+
+
+class StreamingPromptOutput(BaseModel):
+    summary: str
+    capitals: list[CapitalItem]
+    confidence: float
+    tags: Optional[list[str]] = None
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from drtail_prompt.analysis import analyze_prompt
+from drtail_prompt.core import load_prompt
+from drtail_prompt.schema import BasicPromptSchema
+
+DATA_DIR = Path("tests/drtail_prompt/data")
+
+
+@pytest.fixture
+def prompt():
+    return load_prompt(str(DATA_DIR / "analysis.yaml"))
+
+
+def test_analysis_reports_loops_filters_and_scaling_fields(prompt):
+    report = analyze_prompt(prompt.data)
+
+    assert report["loop_depth"] == 2
+    assert [message["loop_depth"] for message in report["messages"]] == [2, 0]
+    assert report["filters"] == {"yaml": {"uses": 1, "max_loop_depth": 0}}
+    assert report["fields"] == {
+        "documents": ["loop"],
+        "documents[].sections": ["loop"],
+        "documents[].sections[]": ["value"],
+        "documents[].title": ["value"],
+        "profile": ["yaml"],
+        "question": ["value"],
+    }
+
+
+def test_analysis_estimates_size_from_input_schema(prompt):
+    report = analyze_prompt(prompt.data, list_length=10, value_size=50)
+
+    assert report["lengths"] == {
+        "documents": {"length": 5, "source": "maxItems"},
+        "documents[].sections": {"length": 10, "source": "default"},
+    }
+    developer, user = report["messages"]
+    assert developer["size_formula"] == (
+        "28 + 43*len(documents) + 51*len(documents)*len(documents[].sections)"
+    )
+    # The question's maxLength, plus the largest branch of the conditional
+    assert user["size_formula"] == "251"
+
+    # At the assumed lengths and value sizes, the estimate is exact
+    rendered = prompt.with_inputs(
+        {
+            "question": "q" * 200,
+            "documents": [
+                {"title": "t" * 40, "sections": ["s" * 50] * 10} for _ in range(5)
+            ],
+        },
+    )
+    assert len(rendered.messages[0].content) == developer["estimated_size"]
+    assert len(rendered.messages[1].content) <= user["estimated_size"]
+
+
+def _analyze_message(content: str, input_schema: dict | None = None) -> dict:
+    data = {
+        "api": "drtail/prompt@v1",
+        "version": "1.0.0",
+        "name": "Analysis",
+        "description": "Analysis",
+        "authors": [{"name": "Humphrey Ahn", "email": "ahnsv@bc.edu"}],
+        "metadata": {},
+        "messages": [{"role": "user", "content": content}],
+    }
+    if input_schema is not None:
+        data["input"] = {"type": "jsonschema", "schema": input_schema}
+    schema = BasicPromptSchema.model_validate(data)
+    return analyze_prompt(schema, list_length=10, value_size=50)["messages"][0]
+
+
+def test_analysis_tracks_template_locals():
+    message = _analyze_message(
+        '{% import "macros.jinja" as macros %}'
+        "{% macro row(cells) %}{% for cell in cells %}{{ cell }}{% endfor %}{% endmacro %}"
+        "{% set limit = count %}"
+        "{% for i in range(limit) %}{{ i }}{% endfor %}"
+        "{% for j in range(3) %}{{ macros.line(j) }}{% endfor %}",
+    )
+
+    assert message["includes"] == ["macros.jinja"]
+    assert message["fields"] == {"count": ["loop"]}
+    assert message["loop_depth"] == 1
+    assert message["size_formula"] == "150 + 50*len(<unknown>) + 50*len(count)"
+
+
+def test_analysis_counts_single_value_filters_as_constant_size():
+    input_schema = {
+        "type": "object",
+        "properties": {"items": {"type": "array", "items": {"type": "integer"}}},
+    }
+
+    message = _analyze_message(
+        "{{ items | length }} {{ items | first }} {{ items | sum }}",
+        input_schema,
+    )
+    assert message["fields"] == {}
+    assert message["size_formula"] == "152"
+
+    message = _analyze_message("{{ items | join(', ') }}", input_schema)
+    assert message["fields"] == {"items": ["value"]}
+    assert message["size_formula"] == "50*len(items)"
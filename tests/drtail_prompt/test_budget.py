@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import pytest
+
+from drtail_prompt.budget import register_token_counter
+from drtail_prompt.core import load_prompt
+from drtail_prompt.exception import PromptBudgetExceededError
+
+DATA_DIR = Path("tests/drtail_prompt/data")
+
+
+@pytest.fixture
+def prompt():
+    return load_prompt(str(DATA_DIR / "budget.yaml"))
+
+
+def rendered_size(prompt) -> int:
+    return sum(len(message.content) for message in prompt.messages)
+
+
+def test_budget_within_limit_renders_inputs_untouched(prompt):
+    rendered = prompt.with_inputs(
+        {"question": "Why?", "history": "Hi.", "documents": ["a", "b"]},
+    )
+
+    assert rendered.messages_dict == [
+        {
+            "role": "developer",
+            "content": "Answer the question using the documents.\n- a\n- b\n",
+        },
+        {"role": "user", "content": "Hi."},
+        {"role": "user", "content": "Why?"},
+    ]
+
+
+def test_budget_truncates_lowest_priority_field_first(prompt):
+    documents = [f"document number {index}" for index in range(20)]
+    rendered = prompt.with_inputs(
+        {"question": "Why?", "history": "Hi.", "documents": documents},
+    )
+
+    developer = rendered.messages[0].content
+    assert rendered_size(rendered) <= 200
+    # The longest prefix of documents that fits is kept
+    kept = developer.count("- document number")
+    assert 0 < kept < len(documents)
+    assert f"- document number {kept - 1}\n" in developer
+    overflow = len(f"- document number {kept}\n")
+    assert rendered_size(rendered) + overflow > 200
+    assert rendered.messages[1].content == "Hi."
+
+
+def test_budget_truncates_next_field_with_marker(prompt):
+    history = " ".join(f"turn-{index}" for index in range(100))
+    rendered = prompt.with_inputs(
+        {"question": "Why?", "history": history, "documents": ["a"] * 10},
+    )
+
+    assert rendered_size(rendered) == 200
+    assert rendered.messages[0].content == "Answer the question using the documents.\n"
+    assert rendered.messages[1].content.startswith("...")
+    assert rendered.messages[1].content.endswith("turn-99")
+
+
+def test_budget_exceeded(prompt):
+    with pytest.raises(PromptBudgetExceededError, match="over the budget of 200 chars"):
+        prompt.with_inputs({"question": "?" * 300, "history": "", "documents": []})
+
+
+def test_budget_search_renders_logarithmically(prompt):
+    renders = 0
+
+    def counting(text: str) -> int:
+        nonlocal renders
+        renders += 1
+        return len(text)
+
+    register_token_counter("counting", counting)
+    prompt.data.budget.unit = "counting"
+    prompt.with_inputs(
+        {
+            "question": "Why?",
+            "history": "Hi.",
+            "documents": [f"doc {index}" for index in range(10_000)],
+        },
+    )
+
+    # 3 messages rendered once, then the developer message only per probe
+    assert renders <= 3 + 16
@@ -4,6 +4,7 @@ import json
 from pathlib import Path
 
 import pytest
+import yaml
 from click.testing import CliRunner
 
 from drtail_prompt.cli import cli
@@ -117,6 +118,46 @@ def test_validate_command_validation_error(
     assert "Invalid value for 'PROMPT_PATH'" in result.output
 
 
+def test_validate_command_analyze(
+    runner: CliRunner,
+    test_data_dir: Path,
+) -> None:
+    """Test validate command reporting the static render cost."""
+    result = runner.invoke(
+        cli,
+        ["validate", str(test_data_dir / "analysis.yaml"), "--analyze"],
+    )
+    assert result.exit_code == 0
+    assert "✅ Prompt validation successful" in result.output
+    assert "Render cost:" in result.output
+    assert "len(documents) = 5 (maxItems)" in result.output
+
+
+def test_validate_command_json_thresholds(
+    runner: CliRunner,
+    test_data_dir: Path,
+) -> None:
+    """Test validate command failing on render-cost thresholds, for CI."""
+    path = str(test_data_dir / "analysis.yaml")
+    result = runner.invoke(cli, ["validate", path, "--json"])
+    assert result.exit_code == 0
+    report = json.loads(result.output)
+    assert report["loop_depth"] == 2
+    assert report["estimated_size"] == 3044
+    assert report["violations"] == []
+
+    result = runner.invoke(
+        cli,
+        ["validate", path, "--json", "--max-loop-depth", "1", "--list-length", "20"],
+    )
+    assert result.exit_code == 1
+    # The report is printed before the error
+    report, _ = json.JSONDecoder().raw_decode(result.output)
+    assert report["estimated_size"] == 5594
+    assert report["violations"] == ["loop depth 2 exceeds 1"]
+    assert "Error: " in result.output
+
+
 def test_generate_schema_command(runner: CliRunner, tmp_path: Path) -> None:
     """Test generate-schema command."""
     output_file = tmp_path / "prompt.json"
@@ -179,3 +220,192 @@ version = "0.1.0"
         with open("pyproject.toml", "rb") as f:
             content = f.read().decode()
             assert 'version = "1.0.0"' in content
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_render_command_jsonl(
+    runner: CliRunner,
+    test_data_dir: Path,
+    tmp_path: Path,
+    workers: str,
+) -> None:
+    """Test render command streams rows in order and splits out failures."""
+    input_file = tmp_path / "inputs.jsonl"
+    rows = [{"location": f"city-{i}", "capital": f"capital-{i}"} for i in range(20)]
+    lines = [json.dumps(row) for row in rows]
+    lines[3] = json.dumps({"location": "missing capital"})
+    lines[7] = "not json"
+    input_file.write_text("\n".join(lines) + "\n")
+    output_file = tmp_path / "out.jsonl"
+    errors_file = tmp_path / "errors.jsonl"
+
+    result = runner.invoke(
+        cli,
+        [
+            "render",
+            str(test_data_dir / "basic_3.yaml"),
+            "--input",
+            str(input_file),
+            "--output",
+            str(output_file),
+            "--errors",
+            str(errors_file),
+            "--workers",
+            workers,
+            "--batch-size",
+            "3",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert "Rendered 18 rows, 2 failed" in result.output
+
+    outputs = [json.loads(line) for line in output_file.read_text().splitlines()]
+    assert [output["row"] for output in outputs] == [
+        i + 1 for i in range(20) if i not in (3, 7)
+    ]
+    assert "The capital of city-0 is capital-0." in outputs[0]["messages"][0]["content"]
+    assert outputs[0]["structured_output_format"]["format"]["type"] == "json_schema"
+
+    errors = [json.loads(line) for line in errors_file.read_text().splitlines()]
+    assert [error["row"] for error in errors] == [4, 8]
+    assert "capital" in errors[0]["error"]
+
+
+def test_render_command_csv_from_stdin(
+    runner: CliRunner,
+    test_data_dir: Path,
+) -> None:
+    """Test render command reading CSV from stdin and writing to stdout."""
+    result = runner.invoke(
+        cli,
+        [
+            "render",
+            str(test_data_dir / "basic_3.yaml"),
+            "--input-format",
+            "csv",
+        ],
+        input="location,capital\nmoon,moon\nearth,washington\n123,null\n",
+    )
+    assert result.exit_code == 0, result.output
+
+    lines = [line for line in result.output.splitlines() if line.startswith("{")]
+    assert len(lines) == 3
+    assert "The capital of earth is washington." in lines[1]
+    # Cells are strings, even when they look like JSON
+    assert "The capital of 123 is null." in lines[2]
+
+
+def test_render_command_reports_render_errors_per_row(
+    runner: CliRunner,
+    tmp_path: Path,
+) -> None:
+    """Test render command sending a row the template fails on to the errors."""
+    prompt = yaml.safe_load(
+        (Path(__file__).parent / "data/json_schema.yaml").read_text(),
+    )
+    prompt["input"] = {"type": "jsonschema", "schema": {"type": "object"}}
+    prompt["messages"] = [{"role": "user", "content": "{{ data | yaml }}"}]
+    prompt_path = tmp_path / "yaml_filter.yaml"
+    prompt_path.write_text(yaml.safe_dump(prompt))
+    errors_file = tmp_path / "errors.jsonl"
+
+    result = runner.invoke(
+        cli,
+        ["render", str(prompt_path), "--errors", str(errors_file)],
+        input='{"data": {"a": 1}}\n{"data": {}}\n{"data": {"b": 2}}\n',
+    )
+    assert result.exit_code == 0, result.output
+    assert "Rendered 2 rows, 1 failed" in result.output
+
+    errors = [json.loads(line) for line in errors_file.read_text().splitlines()]
+    assert errors == [{"row": 2, "error": "ValueError: Value is empty"}]
+
+
+def test_render_command_dumps_stats(
+    runner: CliRunner,
+    test_data_dir: Path,
+    tmp_path: Path,
+) -> None:
+    """Test render command merges worker statistics into the stats dump."""
+    from drtail_prompt import stats
+
+    stats.registry.reset()
+    stats_file = tmp_path / "stats.prom"
+    rows = [json.dumps({"location": f"city-{i}", "capital": "x"}) for i in range(10)]
+
+    result = runner.invoke(
+        cli,
+        [
+            "render",
+            str(test_data_dir / "basic_3.yaml"),
+            "--workers",
+            "2",
+            "--batch-size",
+            "2",
+            "--stats",
+            str(stats_file),
+        ],
+        input="\n".join(rows) + "\n",
+    )
+    assert result.exit_code == 0, result.output
+
+    text = stats_file.read_text()
+    assert (
+        'drtail_prompt_renders_total{prompt="Basic Prompt",version="1.0.0"} 10' in text
+    )
+    assert "drtail_prompt_render_duration_seconds_bucket" in text
+
+
+def test_profile_command(
+    runner: CliRunner,
+    test_data_dir: Path,
+    tmp_path: Path,
+) -> None:
+    """Test profile command prints phase timings, hot functions and allocations."""
+    inputs_file = tmp_path / "inputs.json"
+    inputs_file.write_text(json.dumps({"location": "earth", "capital": "x"}))
+    pstats_path = tmp_path / "prompt.prof"
+    collapsed_path = tmp_path / "prompt.folded"
+
+    result = runner.invoke(
+        cli,
+        [
+            "profile",
+            str(test_data_dir / "basic_3.yaml"),
+            "--inputs",
+            str(inputs_file),
+            "--set",
+            "capital=washington",
+            "--iterations",
+            "3",
+            "--pstats",
+            str(pstats_path),
+            "--collapsed",
+            str(collapsed_path),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert "drtail_prompt.parse_yaml" in result.output
+    assert "drtail_prompt.render" in result.output
+    assert "load_prompt" in result.output
+    assert "peak traced memory" in result.output
+
+    import pstats
+
+    assert pstats.Stats(str(pstats_path)).total_calls > 0
+    stacks = collapsed_path.read_text().splitlines()
+    assert any("drtail_prompt.core.load_prompt;" in line for line in stacks)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+
+
+def test_profile_command_invalid_inputs(
+    runner: CliRunner,
+    test_data_dir: Path,
+) -> None:
+    """Test profile command fails before profiling when inputs are invalid."""
+    result = runner.invoke(
+        cli,
+        ["profile", str(test_data_dir / "basic_3.yaml"), "--set", "location=earth"],
+    )
+    assert result.exit_code != 0
+    assert "Phase timings" not in result.output
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from drtail_prompt import Conversation, load_prompt
+from drtail_prompt.exception import PromptBudgetExceededError
+
+
+@pytest.fixture
+def prompt():
+    return load_prompt(
+        "tests/drtail_prompt/data/basic_3.yaml",
+        inputs={"location": "earth", "capital": "washington"},
+    )
+
+
+def test_conversation_appends_turns_after_the_prompt(prompt):
+    conversation = Conversation(prompt, body={"model": "gpt-4.1"})
+    conversation.add_user("And of Korea?")
+    conversation.add_assistant("Seoul.")
+
+    assert conversation.messages == [
+        *prompt.messages_dict,
+        {"role": "user", "content": "And of Korea?"},
+        {"role": "assistant", "content": "Seoul."},
+    ]
+    assert json.loads(conversation.messages_json()) == conversation.messages
+    assert json.loads(conversation.request_body()) == {
+        "model": "gpt-4.1",
+        "input": conversation.messages,
+    }
+    # The prefix is shared with the rendered prompt, not copied
+    assert conversation.messages[0] is prompt.rendered.messages_dict[0]
+
+
+def test_conversation_without_turns_or_body(prompt):
+    conversation = Conversation(prompt, messages_key="messages")
+
+    assert json.loads(conversation.request_body()) == {
+        "messages": prompt.messages_dict,
+    }
+
+
+def test_conversation_evicts_whole_turns_over_max_turns(prompt):
+    conversation = Conversation(prompt, max_turns=2)
+    for index in range(5):
+        conversation.add_user(f"question {index}")
+        conversation.add_assistant(f"answer {index}")
+
+    assert conversation.turns == 2
+    assert conversation.evicted_turns == 3
+    assert [m["content"] for m in conversation.messages[2:]] == [
+        "question 3",
+        "answer 3",
+        "question 4",
+        "answer 4",
+    ]
+
+
+def test_conversation_evicts_oldest_turns_over_max_size(prompt):
+    prefix_size = sum(len(m["content"]) for m in prompt.messages_dict)
+    conversation = Conversation(prompt, max_size=prefix_size + 25)
+    for index in range(5):
+        conversation.add_user(f"question {index}")  # 10 chars
+        conversation.add_assistant("ok")
+
+    assert conversation.size <= prefix_size + 25
+    assert conversation.turns == 2
+    assert json.loads(conversation.request_body())["input"][-2:] == [
+        {"role": "user", "content": "question 4"},
+        {"role": "assistant", "content": "ok"},
+    ]
+
+
+def test_conversation_rejects_turn_over_max_size(prompt):
+    prefix_size = sum(len(m["content"]) for m in prompt.messages_dict)
+    conversation = Conversation(prompt, max_size=prefix_size + 10)
+    conversation.add_user("question")
+
+    with pytest.raises(PromptBudgetExceededError):
+        conversation.add_assistant("a long answer")
+    assert [m["content"] for m in conversation.messages[2:]] == ["question"]
+
+    with pytest.raises(PromptBudgetExceededError):
+        Conversation(prompt, max_size=prefix_size - 1)
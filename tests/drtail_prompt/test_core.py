@@ -1,3 +1,5 @@
+import copy
+import json
 from typing import Any
 
 import pytest
@@ -209,3 +211,120 @@ def test_prompt_input_validation_error_with_base_model_with_invalid_input():
     assert "Input model is not the same as the model defined in the prompt" in str(
         exc.value,
     )
+
+
+@pytest.fixture
+def fragment_search_path():
+    from drtail_prompt.template import loader, set_template_search_path
+
+    previous = list(loader.searchpath)
+    set_template_search_path("tests/drtail_prompt/data/fragments")
+    yield
+    set_template_search_path(*previous)
+
+
+def test_prompt_input_with_shared_fragments(fragment_search_path):
+    prompt = load_prompt(
+        "tests/drtail_prompt/data/basic_fragments.yaml",
+        {"location": "moon", "capital": "moon"},
+    )
+    assert (
+        prompt.messages[0].content.strip()
+        == "You are a helpful assistant that extracts information from a conversation.\nThe capital of moon is moon."
+    )
+
+
+@pytest.fixture
+def restore_bytecode_cache():
+    from drtail_prompt import template
+
+    previous = template.get_bytecode_cache()
+    yield template
+    template.compile_template.cache_clear()
+    template.environment.bytecode_cache = previous
+
+
+def test_prompt_compilation_uses_bytecode_cache(
+    fragment_search_path,
+    restore_bytecode_cache,
+    tmp_path,
+):
+    restore_bytecode_cache.set_bytecode_cache_dir(tmp_path)
+    load_prompt(
+        "tests/drtail_prompt/data/basic_fragments.yaml",
+        {"location": "moon", "capital": "moon"},
+    )
+    # Both messages plus the included/imported fragments are cached on disk.
+    assert len(list(tmp_path.iterdir())) >= 4
+
+
+@pytest.mark.parametrize("directory", ["missing/dir", "not_a_dir"])
+def test_prompt_compilation_survives_unusable_bytecode_cache(
+    fragment_search_path,
+    restore_bytecode_cache,
+    tmp_path,
+    directory,
+):
+    (tmp_path / "not_a_dir").write_text("")
+    restore_bytecode_cache.set_bytecode_cache_dir(tmp_path / directory)
+    if restore_bytecode_cache.environment.cache is not None:
+        restore_bytecode_cache.environment.cache.clear()
+
+    prompt = load_prompt(
+        "tests/drtail_prompt/data/basic_fragments.yaml",
+        {"location": "moon", "capital": "moon"},
+    )
+
+    assert "The capital of moon is moon." in prompt.messages[0].content
+
+
+def test_default_bytecode_cache_is_created_lazily(
+    restore_bytecode_cache,
+    monkeypatch,
+):
+    template = restore_bytecode_cache
+
+    def unavailable(self):
+        raise RuntimeError("Cannot determine safe temp directory")
+
+    monkeypatch.setattr(
+        template.FileSystemBytecodeCache,
+        "_get_default_cache_dir",
+        unavailable,
+    )
+    monkeypatch.delenv(template.BYTECODE_CACHE_DIR_ENV, raising=False)
+    monkeypatch.setattr(template, "_bytecode_cache_pending", True)
+    template.compile_template.cache_clear()
+
+    assert template.get_bytecode_cache() is None
+    assert template.compile_template("{{ a }}").render(a=1) == "1"
+
+
+def test_prompt_rendered_is_computed_once():
+    prompt = load_prompt("tests/drtail_prompt/data/basic_1.yaml")
+    rendered = prompt.rendered
+
+    assert prompt.rendered is rendered
+    assert rendered.messages_dict == tuple(prompt.messages_dict)
+    assert rendered.metadata == prompt.metadata
+    assert (
+        json.loads(json.dumps(rendered.structured_output_format))
+        == prompt.structured_output_format
+    )
+    assert rendered.messages_dict is prompt.rendered.messages_dict
+    assert json.loads(json.dumps(rendered.messages_dict)) == prompt.messages_dict
+
+
+def test_prompt_rendered_is_read_only():
+    prompt = load_prompt("tests/drtail_prompt/data/basic_1.yaml")
+    rendered = prompt.rendered
+
+    with pytest.raises(AttributeError):
+        rendered.metadata = {}
+    with pytest.raises(TypeError):
+        rendered.metadata["name"] = "other"
+    with pytest.raises(TypeError):
+        rendered.messages_dict[0]["content"] = "other"
+    with pytest.raises(TypeError):
+        rendered.structured_output_format["format"]["schema"].update({})
+    assert copy.deepcopy(rendered.metadata) == rendered.metadata
@@ -0,0 +1,110 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from drtail_prompt import guardrails
+from drtail_prompt.core import load_prompt
+from drtail_prompt.exception import PromptRenderLimitError
+from drtail_prompt.template import compile_template
+
+DATA_DIR = Path("tests/drtail_prompt/data")
+
+
+@pytest.fixture
+def prompt():
+    return load_prompt(str(DATA_DIR / "limits.yaml"))
+
+
+@pytest.fixture
+def default_limits():
+    yield guardrails.set_default_limits
+    guardrails.set_default_limits()
+
+
+def test_render_within_limits(prompt):
+    rendered = prompt.with_inputs({"rows": 2, "columns": 3})
+
+    assert rendered.messages[0].content == "Fill the table.\n0 0 0 \n0 1 2 \n"
+
+
+def test_runaway_render_is_cut_off_within_its_time_limit(prompt):
+    # Output stays small, so only the wall time limit can stop it
+    runaway = {"rows": 10**9, "columns": 0}
+    elapsed = []
+    for _ in range(20):
+        start = time.perf_counter()
+        with pytest.raises(PromptRenderLimitError, match=r"time limit of 0\.05s"):
+            prompt.with_inputs(runaway)
+        elapsed.append(time.perf_counter() - start)
+
+    # Tail latency: even the slowest render stops shortly after the limit
+    assert max(elapsed) < 0.05 + 0.1
+
+
+def test_render_output_limit():
+    template = compile_template("{% for i in range(10**9) %}{{ text }}{% endfor %}")
+
+    with guardrails.limit_render(max_output_bytes=100_000):
+        with pytest.raises(PromptRenderLimitError, match="limit of 100000 bytes"):
+            guardrails.render(template, {"text": "x" * 1000})
+
+
+def test_render_output_limit_counts_utf8_bytes():
+    template = compile_template("{{ text }}")
+
+    with guardrails.limit_render(max_output_bytes=10):
+        assert guardrails.render(template, {"text": "e" * 10}) == "e" * 10
+        with pytest.raises(PromptRenderLimitError, match="limit of 10 bytes"):
+            guardrails.render(template, {"text": "é" * 10})
+
+
+def test_render_loop_iteration_limit(default_limits):
+    default_limits(max_loop_iterations=5)
+    template = compile_template("{% for i in items %}{% endfor %}")
+
+    with guardrails.limit_render():
+        assert guardrails.render(template, {"items": range(5)}) == ""
+        with pytest.raises(PromptRenderLimitError, match="limit of 5 loop iterations"):
+            guardrails.render(template, {"items": range(6)})
+
+
+def test_recursive_loop_iteration_limit():
+    template = compile_template(
+        "{% for i in items recursive %}{{ i.n }}"
+        "{% if i.children %}[{{ loop(i.children) }}]{% endif %}{% endfor %}",
+    )
+    tree = [{"n": n, "children": [{"n": m} for m in range(3)]} for n in range(2)]
+
+    # Top-level and nested items all count: 2 + 2 * 3
+    with guardrails.limit_render(max_loop_iterations=8):
+        assert guardrails.render(template, {"items": tree}) == "0[012]1[012]"
+    with guardrails.limit_render(max_loop_iterations=7):
+        with pytest.raises(PromptRenderLimitError, match="limit of 7 loop iterations"):
+            guardrails.render(template, {"items": tree})
+
+    # A self-referencing tree recurses until the limit stops it
+    node: dict = {"n": 0}
+    node["children"] = [node]
+    with guardrails.limit_render(max_loop_iterations=5):
+        with pytest.raises(PromptRenderLimitError, match="limit of 5 loop iterations"):
+            guardrails.render(template, {"items": [node]})
+
+
+def test_prompt_limits_only_tighten_defaults(prompt, default_limits):
+    default_limits(max_loop_iterations=10)
+
+    with pytest.raises(PromptRenderLimitError, match="limit of 10 loop iterations"):
+        prompt.with_inputs({"rows": 2, "columns": 5})
+
+
+def test_templates_render_unguarded_without_limits():
+    template = compile_template(
+        "{% for i in items recursive %}{{ i.n }}/{{ loop.length }}"
+        "{% if i.children %}[{{ loop(i.children) }}]{% endif %}{% endfor %}",
+    )
+    items = [{"n": 1, "children": [{"n": 2}]}, {"n": 3}]
+
+    with guardrails.limit_render() as guard:
+        assert guard is None
+        assert guardrails.render(template, {"items": items}) == "1/2[2/1]3/2"
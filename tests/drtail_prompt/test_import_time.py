@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+import pytest
+
+import drtail_prompt
+
+# Cumulative import time budgets in microseconds. Generous on purpose: they
+# catch an eager import of pydantic/PyYAML/Jinja2 (~150ms), not noise.
+IMPORT_BUDGETS_US = {
+    "drtail_prompt": 50_000,
+    "drtail_prompt.cli": 150_000,
+}
+HEAVY_MODULES = ("pydantic", "yaml", "jinja2", "importlib.metadata")
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """Returns the cumulative `python -X importtime` microseconds per module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", list(IMPORT_BUDGETS_US))
+def test_import_time_budget(module):
+    # Modules the interpreter imports at startup (site, .pth files) don't count
+    startup = import_times("pass")
+    times = import_times(f"import {module}")
+
+    loaded = set(times) - set(startup)
+    assert not [heavy for heavy in HEAVY_MODULES if heavy in loaded]
+    assert times[module] < IMPORT_BUDGETS_US[module]
+
+
+def test_lazy_attributes():
+    assert drtail_prompt.load_prompt.__module__ == "drtail_prompt.core"
+    assert drtail_prompt.__version__
+    assert "Prompt" in dir(drtail_prompt)
+    with pytest.raises(AttributeError):
+        drtail_prompt.missing  # noqa: B018
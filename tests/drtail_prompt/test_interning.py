@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from drtail_prompt.core import load_prompt
+from drtail_prompt.interning import pool
+from drtail_prompt.template import compile_template
+
+
+@pytest.fixture
+def versions(tmp_path):
+    """Two versions of a prompt that only differ in their version number."""
+    source = Path("tests/drtail_prompt/data/basic_3.yaml").read_text()
+    paths = []
+    for version in ("1.0.0", "1.1.0"):
+        path = tmp_path / f"basic_{version}.yaml"
+        path.write_text(source.replace("version: 1.0.0", f"version: {version}"))
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture(autouse=True)
+def reset_pool():
+    pool.reset()
+    yield
+    pool.enabled = True
+    pool.reset()
+
+
+def test_versions_share_contents_and_records(versions):
+    first, second = (load_prompt(path) for path in versions)
+
+    assert first.data.version != second.data.version
+    assert first.data.authors[0] is second.data.authors[0]
+    assert first.data.metadata is second.data.metadata
+    for a, b in zip(first.messages, second.messages):
+        assert a is not b
+        assert a.content is b.content
+
+    report = pool.report()
+    assert report["deduplicated"]["authors"] == 1
+    assert report["deduplicated"]["metadata"] == 1
+    assert report["deduplicated"]["strings"] >= len(first.messages)
+    assert report["saved_bytes"] > 0
+
+
+def test_shared_records_are_read_only():
+    first = load_prompt("tests/drtail_prompt/data/basic_1.yaml")
+    second = load_prompt("tests/drtail_prompt/data/basic_3.yaml")
+    assert first.data.metadata is second.data.metadata
+
+    with pytest.raises(ValidationError, match="frozen"):
+        first.data.metadata.domain = "changed"
+    with pytest.raises(ValidationError, match="frozen"):
+        first.data.authors[0].email = "changed@example.com"
+
+    assert second.metadata["domain"] == "consultation"
+    assert second.metadata["last_modified_by"] == "ahnsv@bc.edu"
+
+
+def test_versions_share_compiled_templates(versions):
+    first, second = (load_prompt(path) for path in versions)
+
+    for a, b in zip(first.messages, second.messages):
+        assert compile_template(a.content) is compile_template(b.content)
+
+
+def test_rendering_a_version_leaves_the_shared_values_untouched(versions):
+    first, second = (load_prompt(path) for path in versions)
+    source = second.messages[0].content
+
+    first.with_inputs({"location": "moon", "capital": "moon"})
+    load_prompt(versions[0], {"location": "earth", "capital": "washington"})
+
+    assert first.messages[0].content is source
+    assert second.messages[0].content is source
+
+
+def test_interning_disabled(versions):
+    pool.enabled = False
+    first, second = (load_prompt(path) for path in versions)
+
+    assert first.data.metadata is not second.data.metadata
+    assert pool.report()["deduplicated"] == {}
@@ -0,0 +1,206 @@
+import re
+from pathlib import Path
+from typing import Literal, Union
+
+import pytest
+import yaml
+from pydantic import BaseModel, Field
+
+from drtail_prompt.core import load_prompt
+from drtail_prompt.exception import PromptValidationError
+from drtail_prompt.json_schema import compile_schema
+from tests.drtail_prompt._schema import StreamingPromptOutput
+
+DATA_DIR = Path("tests/drtail_prompt/data")
+
+
+def test_json_schema_prompt_renders_without_model_imports():
+    prompt = load_prompt(
+        str(DATA_DIR / "json_schema.yaml"),
+        inputs={
+            "location": "Korea",
+            "capitals": [{"name": "Seoul", "population": 9_400_000}],
+        },
+    )
+
+    assert prompt.data.input.instance is None
+    assert prompt.messages_dict[0]["content"] == (
+        "You are a helpful assistant that extracts information from a conversation.\n"
+        "The capital of Korea was Seoul.\n"
+    )
+    assert prompt.messages_dict[1]["content"] == "What is the capital of Korea?"
+
+
+def test_json_schema_prompt_structured_output_format_is_inline_schema():
+    prompt = load_prompt(str(DATA_DIR / "json_schema.yaml"))
+
+    assert prompt.structured_output_format == {
+        "format": {
+            "type": "json_schema",
+            "name": "CapitalAnswer",
+            "schema": prompt.data.output.schema_,
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    ("inputs", "message"),
+    [
+        ({"location": "Korea"}, "missing required field 'capitals'"),
+        ({"location": "", "capitals": []}, "Invalid value at 'location'"),
+        (
+            {"location": "Korea", "capitals": [{"name": 1}]},
+            "Invalid value at 'capitals.0.name': expected string, got integer",
+        ),
+        (
+            {"location": "Korea", "capitals": [{"name": "Seoul", "population": -1}]},
+            "Invalid value at 'capitals.0.population': -1 < 0",
+        ),
+        ({"location": "Korea", "capitals": [], "extra": 1}, "unexpected field"),
+    ],
+)
+def test_json_schema_prompt_input_validation_error(inputs, message):
+    prompt = load_prompt(str(DATA_DIR / "json_schema.yaml"))
+
+    with pytest.raises(PromptValidationError, match=re.escape(message)):
+        prompt.with_inputs(inputs)
+
+
+def test_json_schema_prompt_accepts_base_model_inputs():
+    class Inputs(BaseModel):
+        location: str
+        capitals: list[dict]
+
+    prompt = load_prompt(str(DATA_DIR / "json_schema.yaml"))
+    rendered = prompt.with_inputs(Inputs(location="Korea", capitals=[]))
+
+    assert rendered.messages_dict[1]["content"] == "What is the capital of Korea?"
+
+
+def test_json_schema_prompt_with_unsupported_keyword():
+    prompt = load_prompt(str(DATA_DIR / "json_schema.yaml"))
+    document = prompt.data.model_dump(by_alias=True, exclude={"input", "output"})
+    document["input"] = {
+        "type": "jsonschema",
+        "schema": {"type": "object", "dependentRequired": {}},
+    }
+
+    with pytest.raises(ValueError, match="Unsupported JSON schema keywords"):
+        type(prompt.data).model_validate(document)
+
+
+@pytest.mark.parametrize(
+    ("schema", "message"),
+    [
+        ({"type": "string", "pattern": "("}, "Invalid JSON schema pattern"),
+        ({"type": 3}, "'type' should be a string or an array of strings"),
+        ({"type": "object", "properties": []}, "'properties' should be an object"),
+        ({"type": "object", "required": "abc"}, "'required' should be an array"),
+        ({"type": "string", "maxLength": "10"}, "'maxLength' should be"),
+        ({"enum": "abc"}, "'enum' should be an array"),
+        ({"anyOf": {"type": "string"}}, "'anyOf' should be an array"),
+        ({"type": "number", "multipleOf": 0}, "'multipleOf' should be"),
+    ],
+)
+def test_compile_schema_rejects_malformed_schema(schema, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        compile_schema(schema)
+
+
+def test_json_schema_prompt_with_malformed_schema(tmp_path):
+    prompt = load_prompt(str(DATA_DIR / "json_schema.yaml"))
+    document = prompt.data.model_dump(by_alias=True, exclude={"input", "output"})
+    document["input"] = {
+        "type": "jsonschema",
+        "schema": {"type": "object", "properties": {"name": {"pattern": "("}}},
+    }
+    path = tmp_path / "prompt.yaml"
+    path.write_text(yaml.safe_dump(document))
+
+    with pytest.raises(PromptValidationError, match="Invalid JSON schema pattern"):
+        load_prompt(str(path))
+
+
+def test_compile_schema_matches_pydantic_generated_schema():
+    validate = compile_schema(StreamingPromptOutput.model_json_schema())
+    valid = {
+        "summary": "Capitals",
+        "capitals": [{"location": "Korea", "capital": "Seoul"}],
+        "confidence": 0.9,
+        "tags": None,
+    }
+
+    validate(valid)
+    validate({**valid, "tags": ["asia"]})
+    with pytest.raises(PromptValidationError, match="'tags'"):
+        validate({**valid, "tags": "asia"})
+    with pytest.raises(PromptValidationError, match=re.escape("'capitals.0'")):
+        validate({**valid, "capitals": [{"location": "Korea"}]})
+
+
+def test_compile_schema_recursive_ref():
+    validate = compile_schema(
+        {
+            "$ref": "#/$defs/Node",
+            "$defs": {
+                "Node": {
+                    "type": "object",
+                    "properties": {
+                        "value": {"type": "integer"},
+                        "children": {
+                            "type": "array",
+                            "items": {"$ref": "#/$defs/Node"},
+                        },
+                    },
+                },
+            },
+        },
+    )
+
+    validate({"value": 1, "children": [{"value": 2, "children": []}]})
+    with pytest.raises(PromptValidationError, match=re.escape("'children.0.value'")):
+        validate({"value": 1, "children": [{"value": True}]})
+
+
+class Cat(BaseModel):
+    kind: Literal["cat"]
+    lives: int
+
+
+class Dog(BaseModel):
+    kind: Literal["dog"]
+    name: str
+
+
+class Pet(BaseModel):
+    pet: Union[Cat, Dog] = Field(discriminator="kind")
+
+
+def test_compile_schema_discriminated_union():
+    validate = compile_schema(Pet.model_json_schema())
+
+    validate({"pet": {"kind": "cat", "lives": 9}})
+    validate({"pet": {"kind": "dog", "name": "Rex"}})
+    with pytest.raises(PromptValidationError, match="'pet"):
+        validate({"pet": {"kind": "dog", "lives": 9}})
+
+
+@pytest.mark.parametrize(
+    ("limit", "value", "valid"),
+    [
+        (0.1, 0.3, True),
+        (0.1, 0.35, False),
+        (0.01, 19.99, True),
+        (0.5, 3, True),
+        (3, 9, True),
+        (3, 10, False),
+    ],
+)
+def test_compile_schema_multiple_of(limit, value, valid):
+    validate = compile_schema({"type": "number", "multipleOf": limit})
+
+    if valid:
+        validate(value)
+    else:
+        with pytest.raises(PromptValidationError, match="is not a multiple of"):
+            validate(value)
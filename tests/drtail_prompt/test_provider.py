@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from drtail_prompt.core import load_prompt
+from drtail_prompt.exception import PromptValidationError
+from drtail_prompt.provider import (
+    AnthropicPayloadBuilder,
+    GeminiPayloadBuilder,
+    OpenAIPayloadBuilder,
+    PayloadBuilder,
+)
+
+DATA_DIR = Path("tests/drtail_prompt/data")
+
+BUILDERS = [
+    ("openai", OpenAIPayloadBuilder, "gpt-4.1"),
+    ("anthropic", AnthropicPayloadBuilder, "claude-sonnet-4-5"),
+    ("gemini", GeminiPayloadBuilder, "gemini-2.5-flash"),
+]
+
+
+def load_fixture(name: str) -> dict:
+    with open(DATA_DIR / "payloads" / name) as f:
+        return json.load(f)
+
+
+def as_json(body: dict) -> dict:
+    return json.loads(json.dumps(body))
+
+
+@pytest.mark.parametrize("provider,builder_class,model", BUILDERS)
+def test_payload_matches_recorded_fixture(provider, builder_class, model):
+    template = load_prompt(DATA_DIR / "basic_3.yaml")
+    prompt = load_prompt(
+        DATA_DIR / "basic_3.yaml",
+        {"location": "moon", "capital": "moon"},
+    )
+
+    body = builder_class(template, model).build(prompt)
+
+    assert as_json(body) == load_fixture(f"basic_3.{provider}.json")
+
+
+@pytest.mark.parametrize("provider,builder_class,model", BUILDERS)
+def test_payload_maps_roles_for_multi_turn_prompt(provider, builder_class, model):
+    prompt = load_prompt(DATA_DIR / "multi_turn.yaml")
+
+    body = builder_class(prompt, model).build(prompt)
+
+    assert as_json(body) == load_fixture(f"multi_turn.{provider}.json")
+
+
+def test_payload_static_parts_are_shared_between_calls():
+    template = load_prompt(DATA_DIR / "basic_3.yaml")
+    builder = OpenAIPayloadBuilder(template, "gpt-4.1")
+
+    first = builder.build(
+        load_prompt(DATA_DIR / "basic_3.yaml", {"location": "a", "capital": "b"}),
+    )
+    second = builder.build(
+        load_prompt(DATA_DIR / "basic_3.yaml", {"location": "c", "capital": "d"}),
+    )
+
+    assert first["text"] is second["text"]
+    assert first["metadata"] is second["metadata"]
+    assert first["input"][0]["content"] != second["input"][0]["content"]
+
+
+def test_payload_rejects_prompt_with_different_messages():
+    builder = OpenAIPayloadBuilder(load_prompt(DATA_DIR / "basic_3.yaml"), "gpt-4.1")
+
+    with pytest.raises(PromptValidationError):
+        builder.build(load_prompt(DATA_DIR / "multi_turn.yaml"))
+
+
+def test_payload_builder_subclass_must_implement_body_parts():
+    class IncompleteBuilder(PayloadBuilder):
+        def _static_body(self, prompt, model):
+            return {"model": model}
+
+    with pytest.raises(TypeError, match="_dynamic_body"):
+        IncompleteBuilder(load_prompt(DATA_DIR / "basic_3.yaml"), "model")
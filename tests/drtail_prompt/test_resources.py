@@ -0,0 +1,72 @@
+import sys
+import zipfile
+from importlib.resources import files
+from pathlib import Path
+
+import pytest
+
+from drtail_prompt import load_package_prompt, load_prompt, resources
+
+DATA_DIR = Path("tests/drtail_prompt/data")
+
+
+@pytest.fixture
+def zipped_package(tmp_path, monkeypatch):
+    """A package holding prompts, imported from a zip archive."""
+    archive = tmp_path / "prompts.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("zipped_prompts/__init__.py", "")
+        zf.write(DATA_DIR / "basic_1.yaml", "zipped_prompts/basic_1.yaml")
+        zf.write(DATA_DIR / "basic_3.yaml", "zipped_prompts/nested/basic_3.yaml")
+    monkeypatch.syspath_prepend(str(archive))
+    yield "zipped_prompts"
+    sys.modules.pop("zipped_prompts", None)
+    resources.clear_cache()
+
+
+def test_load_package_prompt_from_zip_archive(zipped_package):
+    assert list(resources.list_resources(zipped_package)) == [
+        "basic_1.yaml",
+        "nested/basic_3.yaml",
+    ]
+
+    prompt = load_package_prompt(
+        zipped_package,
+        "nested/basic_3.yaml",
+        inputs={"location": "earth", "capital": "washington"},
+    )
+    expected = load_prompt(
+        str(DATA_DIR / "basic_3.yaml"),
+        inputs={"location": "earth", "capital": "washington"},
+    )
+    assert prompt.messages_dict == expected.messages_dict
+
+
+def test_load_package_prompts_scan_the_archive_once(zipped_package, monkeypatch):
+    scans = 0
+    read_directory = zipfile.ZipFile._RealGetContents
+
+    def counting(self):
+        nonlocal scans
+        scans += 1
+        read_directory(self)
+
+    monkeypatch.setattr(zipfile.ZipFile, "_RealGetContents", counting)
+
+    for _ in range(10):
+        for name in resources.list_resources(zipped_package):
+            load_package_prompt(zipped_package, name)
+
+    assert scans == 1
+    assert resources.read_resource.cache_info().misses == 2
+
+
+def test_load_prompt_from_traversable(zipped_package):
+    prompt = load_prompt(files(zipped_package) / "basic_1.yaml")
+
+    assert prompt.data.name == "Basic Prompt"
+
+
+def test_load_package_prompt_missing_resource(zipped_package):
+    with pytest.raises(FileNotFoundError, match="No resource 'missing"):
+        load_package_prompt(zipped_package, "missing.yaml")
@@ -0,0 +1,147 @@
+import pickle
+import threading
+
+import pytest
+
+from drtail_prompt import stats
+from drtail_prompt.core import load_prompt
+from drtail_prompt.exception import PromptValidationError
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    stats.registry.reset()
+    yield stats.registry
+    stats.registry.reset()
+
+
+def prompt_stats(registry, name):
+    return next(p for p in registry.snapshot()["prompts"] if p["name"] == name)
+
+
+def test_library_updates_stats_on_hot_paths(registry):
+    from drtail_prompt.template import compile_template
+
+    compile_template.cache_clear()
+    for _ in range(3):
+        load_prompt(
+            "tests/drtail_prompt/data/basic_3.yaml",
+            {"location": "moon", "capital": "moon"},
+        )
+    with pytest.raises(PromptValidationError):
+        load_prompt("tests/drtail_prompt/data/basic_3.yaml", {"location": "moon"})
+
+    snapshot = prompt_stats(registry, "Basic Prompt")
+    assert snapshot["version"] == "1.0.0"
+    assert snapshot["loads"] == 4
+    assert snapshot["renders"] == 3
+    assert snapshot["validation_failures"] == 1
+    assert snapshot["render_latency_seconds"]["count"] == 3
+    assert snapshot["render_latency_seconds"]["p99"] > 0
+    assert 0 < snapshot["rendered_bytes"]["p50"] <= 256
+
+    # Compiled templates are shared in memory, the bytecode cache is only
+    # consulted the first time each message is compiled.
+    caches = registry.snapshot()["caches"]
+    assert caches["templates"]["hits"] == 4
+    assert caches["templates"]["misses"] == 2
+    bytecode = caches["template_bytecode"]
+    assert bytecode["hits"] + bytecode["misses"] == 2
+
+
+def test_histogram_quantiles():
+    histogram = stats.Histogram((1, 2, 4, 8))
+    for value in [0.5] * 50 + [3] * 45 + [100] * 5:
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == pytest.approx(1.0)
+    assert 2 < histogram.quantile(0.95) <= 4
+    assert histogram.quantile(0.99) == 8
+    assert histogram.snapshot()["count"] == 100
+
+
+def test_registry_is_thread_safe():
+    registry = stats.StatsRegistry()
+
+    def work():
+        for _ in range(1000):
+            registry.record_render("prompt", "1.0.0", 0.001, 100)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.snapshot()["prompts"][0]["renders"] == 8000
+
+
+def test_snapshot_while_a_cache_is_registered():
+    registry = stats.StatsRegistry()
+
+    def source():
+        # Another thread registering its cache while the snapshot reads this one
+        registry.register_cache("late", lambda: (0, 1))
+        return 1, 0
+
+    registry.register_cache("early", source)
+
+    assert registry.snapshot()["caches"]["early"]["hits"] == 1
+    assert registry.snapshot()["caches"]["late"]["misses"] == 1
+
+
+def test_drain_and_merge_across_processes():
+    worker = stats.StatsRegistry()
+    worker.record_load("prompt", "1.0.0")
+    worker.record_render("prompt", "1.0.0", 0.002, 512)
+    worker.record_cache("template_bytecode", hit=True)
+
+    main = stats.StatsRegistry()
+    main.record_load("prompt", "1.0.0")
+    main.merge(pickle.loads(pickle.dumps(worker.drain())))
+
+    snapshot = main.snapshot()
+    assert snapshot["prompts"][0]["loads"] == 2
+    assert snapshot["prompts"][0]["renders"] == 1
+    assert snapshot["caches"]["template_bytecode"]["hit_rate"] == 1.0
+    assert worker.snapshot() == {"prompts": [], "caches": {}}
+
+
+def test_prometheus_export():
+    registry = stats.StatsRegistry()
+    registry.record_load('Quote "prompt"', "1.0.0")
+    registry.record_render('Quote "prompt"', "1.0.0", 0.003, 2000)
+    registry.register_cache("validators", lambda: (3, 1))
+
+    text = registry.to_prometheus()
+
+    labels = 'prompt="Quote \\"prompt\\"",version="1.0.0"'
+    assert "# TYPE drtail_prompt_loads_total counter" in text
+    assert f"drtail_prompt_loads_total{{{labels}}} 1" in text
+    assert "# TYPE drtail_prompt_render_duration_seconds histogram" in text
+    assert (
+        f'drtail_prompt_render_duration_seconds_bucket{{{labels},le="0.0025"}} 0'
+        in text
+    )
+    assert (
+        f'drtail_prompt_render_duration_seconds_bucket{{{labels},le="0.005"}} 1' in text
+    )
+    assert (
+        f'drtail_prompt_render_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    )
+    assert f"drtail_prompt_rendered_bytes_count{{{labels}}} 1" in text
+    assert 'drtail_prompt_cache_hits_total{cache="validators"} 3' in text
+    assert 'drtail_prompt_cache_misses_total{cache="validators"} 1' in text
+    assert text.endswith("\n")
+
+
+def test_prometheus_export_keeps_large_numbers_exact():
+    registry = stats.StatsRegistry()
+    registry.record_render("prompt", "1.0.0", 0.003, 3703701)
+
+    text = registry.to_prometheus()
+
+    labels = 'prompt="prompt",version="1.0.0"'
+    assert f"drtail_prompt_rendered_bytes_sum{{{labels}}} 3703701.0" in text
+    assert f'drtail_prompt_rendered_bytes_bucket{{{labels},le="1048576.0"}} 0' in text
+    assert f'drtail_prompt_rendered_bytes_bucket{{{labels},le="4194304.0"}} 1' in text
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from drtail_prompt.core import load_prompt
+from drtail_prompt.exception import PromptValidationError
+from drtail_prompt.stream import _list_item_type, parse_stream
+
+DATA_DIR = Path("tests/drtail_prompt/data")
+
+
+def load_chunks(name: str) -> list[str]:
+    with open(DATA_DIR / "streams" / name) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def prompt():
+    return load_prompt(str(DATA_DIR / "streaming.yaml"))
+
+
+def test_parse_stream_emits_fields_and_items_as_they_complete(prompt):
+    chunks = load_chunks("streaming_ok.json")
+    consumed: list[int] = []
+
+    def stream():
+        for index, chunk in enumerate(chunks):
+            consumed.append(index)
+            yield chunk
+
+    events = []
+    for event in prompt.parse_stream(stream()):
+        events.append((event.path, consumed[-1]))
+
+    assert [path for path, _ in events] == [
+        ("summary",),
+        ("capitals", 0),
+        ("capitals", 1),
+        ("capitals",),
+        ("confidence",),
+        ("tags", 0),
+        ("tags", 1),
+        ("tags",),
+        (),
+    ]
+    # The first list item is available right after the chunk that closes it.
+    assert dict(events)[("capitals", 0)] == 5
+
+
+def test_parse_stream_returns_validated_output(prompt):
+    from tests.drtail_prompt._schema import CapitalItem, StreamingPromptOutput
+
+    events = list(prompt.parse_stream(load_chunks("streaming_ok.json")))
+    values = {event.path: event.value for event in events}
+
+    assert values[("summary",)] == 'Two capitals "found".'
+    assert values[("capitals", 1)] == CapitalItem(location="moon", capital="moon")
+    assert values[("confidence",)] == 0.87
+    assert values[()] == StreamingPromptOutput.model_validate_json(
+        "".join(load_chunks("streaming_ok.json")),
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7])
+def test_parse_stream_is_independent_of_chunk_boundaries(prompt, chunk_size):
+    text = "".join(load_chunks("streaming_ok.json"))
+    chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    events = list(prompt.parse_stream(chunks))
+
+    assert events == list(prompt.parse_stream([text]))
+
+
+def test_parse_stream_fails_fast_on_invalid_item(prompt):
+    chunks = load_chunks("streaming_invalid_item.json")
+    consumed: list[str] = []
+
+    def stream():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    with pytest.raises(PromptValidationError) as exc:
+        list(prompt.parse_stream(stream()))
+
+    assert "capital" in str(exc.value)
+    # The remaining chunks are never read.
+    assert len(consumed) == 3
+
+
+@pytest.mark.parametrize(
+    "text,message",
+    [
+        ('["not", "an", "object"]', "JSON object"),
+        ('{"summary": 1}', "summary"),
+        ('{"summary": "ok" "capitals": []}', "Unexpected"),
+        ('{"summary": "ok", "capitals": [], "confidence": 1', "ended"),
+        ('{"summary": "ok", "capitals": []}', "confidence"),
+        ('{"summary": "ok", "capitals": [], "confidence": 1,}', "Unexpected '}'"),
+        (
+            '{"summary": "ok", "capitals": [{"location": "a", "capital": "b"},]}',
+            "Unexpected ']'",
+        ),
+        ('{"summary": "ok", "tags": ["a" "b"]}', "Unexpected '\"'"),
+        ('{"summary": "ok", "tags": ["a", 1 2]}', "tags"),
+        ('{"summary": "x": "y"}', "Unexpected ':'"),
+        ('{"summary" "x"}', "Unexpected '\"'"),
+        ('{"summary": "x" "capitals": []}', "Unexpected '\"'"),
+        ('{"confidence": 1 "summary": "x"}', "Unexpected '\"'"),
+        ('{"confidence": 1: 2}', "Unexpected ':'"),
+    ],
+)
+def test_parse_stream_raises_on_invalid_output(prompt, text, message):
+    with pytest.raises(PromptValidationError) as exc:
+        list(prompt.parse_stream([text]))
+    assert message in str(exc.value)
+
+
+def test_parse_stream_empty_list_before_object_field():
+    class Output(BaseModel):
+        items: list[int]
+        meta: dict[str, int]
+
+    events = list(parse_stream(Output, ['{"items": [], "meta": {"a": 1}}']))
+
+    assert [event.path for event in events] == [("items",), ("meta",), ()]
+    assert events[-1].value == Output(items=[], meta={"a": 1})
+
+
+def test_parse_stream_empty_list_before_undeclared_object_field(prompt):
+    text = '{"summary": "ok", "capitals": [], "other": {"k": "v"}, "confidence": 1}'
+
+    events = list(prompt.parse_stream([text]))
+
+    assert [event.path for event in events] == [
+        ("summary",),
+        ("capitals",),
+        ("confidence",),
+        (),
+    ]
+
+
+def test_aparse_stream(prompt):
+    async def stream():
+        for chunk in load_chunks("streaming_ok.json"):
+            yield chunk
+
+    async def collect():
+        return [event async for event in prompt.aparse_stream(stream())]
+
+    events = asyncio.run(collect())
+
+    assert events == list(prompt.parse_stream(load_chunks("streaming_ok.json")))
+
+
+def test_parse_stream_requires_output_model():
+    prompt = load_prompt(str(DATA_DIR / "basic_2.yaml"))
+
+    with pytest.raises(PromptValidationError):
+        prompt.parse_stream([])
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="X | Y needs Python 3.10")
+def test_list_item_type_of_union_type():
+    assert _list_item_type(eval("list[int] | None")) is int
+
+
+def test_list_item_type_of_optional():
+    assert _list_item_type(Optional[list[int]]) is int
+    assert _list_item_type(Optional[int]) is None
@@ -0,0 +1,151 @@
+from typing import Any, Optional
+
+import pytest
+
+from drtail_prompt import tracing
+from drtail_prompt.core import load_prompt
+from drtail_prompt.exception import PromptValidationError
+
+
+class RecordingTracer(tracing.Tracer):
+    def __init__(self) -> None:
+        self.events: list[tuple[str, str, dict[str, Any]]] = []
+
+    def on_start(self, name: str, attributes: dict[str, Any]) -> Any:
+        self.events.append(("start", name, attributes))
+        return name
+
+    def on_end(
+        self,
+        token: Any,
+        name: str,
+        attributes: dict[str, Any],
+        error: Optional[BaseException],
+    ) -> None:
+        assert token == name
+        self.events.append(("end", name, {**attributes, "error": error}))
+
+
+@pytest.fixture
+def tracer():
+    recording = RecordingTracer()
+    tracing.set_tracer(recording)
+    yield recording
+    tracing.set_tracer(None)
+
+
+def test_load_prompt_emits_phase_spans(tracer):
+    load_prompt(
+        "tests/drtail_prompt/data/basic_3.yaml",
+        {"location": "moon", "capital": "moon"},
+    )
+
+    assert [(kind, name) for kind, name, _ in tracer.events] == [
+        ("start", tracing.LOAD_PROMPT),
+        ("start", tracing.READ_FILE),
+        ("end", tracing.READ_FILE),
+        ("start", tracing.PARSE_YAML),
+        ("end", tracing.PARSE_YAML),
+        ("start", tracing.VALIDATE_SCHEMA),
+        ("start", tracing.IMPORT_MODEL),
+        ("end", tracing.IMPORT_MODEL),
+        ("start", tracing.IMPORT_MODEL),
+        ("end", tracing.IMPORT_MODEL),
+        ("end", tracing.VALIDATE_SCHEMA),
+        ("start", tracing.VALIDATE_INPUT),
+        ("end", tracing.VALIDATE_INPUT),
+        ("start", tracing.RENDER),
+        ("end", tracing.RENDER),
+        ("end", tracing.LOAD_PROMPT),
+    ]
+
+    ended = {
+        name: attributes for kind, name, attributes in tracer.events if kind == "end"
+    }
+    assert ended[tracing.LOAD_PROMPT]["prompt_name"] == "Basic Prompt"
+    assert ended[tracing.LOAD_PROMPT]["prompt_version"] == "1.0.0"
+    assert ended[tracing.LOAD_PROMPT]["message_count"] == 2
+    assert ended[tracing.READ_FILE]["bytes"] > 0
+    assert ended[tracing.RENDER]["message_count"] == 2
+    assert ended[tracing.RENDER]["rendered_bytes"] > 0
+
+
+def test_span_sizes_are_utf8_bytes(tracer):
+    prompt = load_prompt(
+        "tests/drtail_prompt/data/basic_3.yaml",
+        {"location": "Zürich", "capital": "Bern"},
+    )
+
+    ended = {
+        name: attributes for kind, name, attributes in tracer.events if kind == "end"
+    }
+    with open("tests/drtail_prompt/data/basic_3.yaml", "rb") as f:
+        assert ended[tracing.READ_FILE]["bytes"] == len(f.read())
+    assert ended[tracing.RENDER]["rendered_bytes"] == sum(
+        len(message.content.encode("utf-8")) for message in prompt.messages
+    )
+    assert ended[tracing.RENDER]["rendered_bytes"] > sum(
+        len(message.content) for message in prompt.messages
+    )
+
+
+def test_span_reports_error(tracer):
+    with pytest.raises(PromptValidationError):
+        load_prompt("tests/drtail_prompt/data/basic_3.yaml", {"location": "moon"})
+
+    ended = {
+        name: attributes for kind, name, attributes in tracer.events if kind == "end"
+    }
+    assert isinstance(ended[tracing.VALIDATE_INPUT]["error"], PromptValidationError)
+    assert isinstance(ended[tracing.LOAD_PROMPT]["error"], PromptValidationError)
+    assert ended[tracing.PARSE_YAML]["error"] is None
+
+
+def test_span_is_shared_noop_without_tracer():
+    assert tracing.get_tracer() is None
+    assert tracing.span("a") is tracing.span("b", key="value")
+
+
+def test_opentelemetry_tracer_exports_nested_spans():
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+    from opentelemetry.trace import StatusCode
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracing.set_tracer(tracing.OpenTelemetryTracer(provider.get_tracer("test")))
+    try:
+        load_prompt(
+            "tests/drtail_prompt/data/basic_3.yaml",
+            {"location": "moon", "capital": "moon"},
+        )
+        with pytest.raises(PromptValidationError):
+            load_prompt("tests/drtail_prompt/data/basic_3.yaml", {"location": "moon"})
+    finally:
+        tracing.set_tracer(None)
+
+    spans = exporter.get_finished_spans()
+    roots = [span for span in spans if span.name == tracing.LOAD_PROMPT]
+    assert len(roots) == 2
+    ok_root, failed_root = roots
+
+    children = {
+        span.name: span
+        for span in spans
+        if span.parent and span.parent.span_id == ok_root.context.span_id
+    }
+    assert set(children) == {
+        tracing.READ_FILE,
+        tracing.PARSE_YAML,
+        tracing.VALIDATE_SCHEMA,
+        tracing.VALIDATE_INPUT,
+        tracing.RENDER,
+    }
+    assert ok_root.attributes["prompt_name"] == "Basic Prompt"
+    assert children[tracing.RENDER].attributes["rendered_bytes"] > 0
+    assert failed_root.status.status_code == StatusCode.ERROR